@@ -278,7 +278,8 @@ def run_pipeline(file_path, *, verbose: bool = False):
             if data_analyst_agent is None:
                 with suppress_stdout(not verbose):
                     data_analyst_agent = DataAnalystAgent()
-            with progress_step("[3/7] DataAnalystAgent: analyzing referenced data files"):
+            # The agent owns a worker pool; release it once this problem's analysis is done
+            with data_analyst_agent, progress_step("[3/7] DataAnalystAgent: analyzing referenced data files"):
                 try:
                     with suppress_stdout(not verbose):
                         # Pass problem_output_dir explicitly to ensure data files are found correctly
@@ -50,3 +50,27 @@ class Config:
     MODEL_DATA_PLANNER = os.getenv("MODEL_DATA_PLANNER", MODEL_BRAIN)
     MODEL_DATA_EXECUTOR = os.getenv("MODEL_DATA_EXECUTOR", MODEL_BRAIN)
     MODEL_DATA_SUMMARIZER = os.getenv("MODEL_DATA_SUMMARIZER", MODEL_BRAIN)
+
+    # Data Analyst Stage 2: upper bound on concurrent per-file executor LLM calls.
+    # Lower this if your LLM provider enforces tight RPM limits.
+    DATA_ANALYST_MAX_WORKERS = int(os.getenv("DATA_ANALYST_MAX_WORKERS", "8"))
+
+    # Data Analyst Stage 2: number of files analyzed per executor LLM call.
+    # Set to 1 to disable batching and analyze every file with its own call.
+    DATA_EXECUTOR_BATCH_SIZE = int(os.getenv("DATA_EXECUTOR_BATCH_SIZE", "4"))
+
+    # Data Analyst Stage 2: on-disk cache of per-file analysis results, keyed by file
+    # content, analysis context and executor model. Empty (default) disables caching.
+    # Example: DATA_ANALYST_CACHE_DIR=.cache/data_analyst
+    DATA_ANALYST_CACHE_DIR = os.getenv("DATA_ANALYST_CACHE_DIR", "")
+
+    # Data Analyst (all stages): on-disk cache of LLM responses, keyed by model,
+    # temperature and the full prompt. Identical prompts (e.g. re-running a problem)
+    # reuse the stored response instead of calling the API. Empty (default) disables it.
+    # Example: DATA_ANALYST_LLM_CACHE_DIR=.cache/data_analyst_llm
+    DATA_ANALYST_LLM_CACHE_DIR = os.getenv("DATA_ANALYST_LLM_CACHE_DIR", "")
+
+    # Data Analyst Stage 2: stream executor code generations and close the request as
+    # soon as the ```python block is complete (skips any trailing prose). Set to 0 for
+    # providers/proxies without SSE streaming support.
+    DATA_ANALYST_STREAM_CODE = os.getenv("DATA_ANALYST_STREAM_CODE", "1") != "0"
@@ -1,13 +1,18 @@
 from pathlib import Path
-from typing import Dict, Optional, Any
+from typing import Dict, Iterator, Optional, Any
+import functools
 import requests
 import logging
 import json
 
 from src.bio_agents.config import Config
+from .data_utils import AnalysisCache
 
 logger = logging.getLogger(__name__)
 
+_CODE_FENCE_OPEN = "```python"
+_CODE_FENCE_CLOSE = "```"
+
 class BaseAnalyst:
     """
     Base class for Data Analyst LLM modules.
@@ -16,18 +21,38 @@ class BaseAnalyst:
     def __init__(self, model: str = Config.MODEL_BRAIN, timeout: int = Config.TIMEOUT):
         self.model = model
         self.timeout = timeout
-        
-    def _call_llm(self, messages: list[Dict[str, str]], temperature: float = 0.2) -> str:
+        self.llm_cache = AnalysisCache(Config.DATA_ANALYST_LLM_CACHE_DIR)
+
+    def _call_llm(
+        self,
+        messages: list[Dict[str, str]],
+        temperature: float = 0.2,
+        stop_at_code_fence: bool = False
+    ) -> str:
         """
         Call OpenRouter LLM API with standard error handling.
         
         Args:
             messages: List of message dicts [{'role': 'system', 'content': '...'}, ...]
             temperature: Sampling temperature
+            stop_at_code_fence: Stream the response and stop once the first ```python
+                block is closed (Config.DATA_ANALYST_STREAM_CODE). The returned text then
+                ends at that fence, which yields the same extracted code.
             
         Returns:
             LLM response content string
         """
+        if stop_at_code_fence and Config.DATA_ANALYST_STREAM_CODE:
+            try:
+                return self._call_llm_until_code_fence(messages, temperature)
+            except requests.exceptions.HTTPError as e:
+                # 401/429/5xx would fail the same way again; don't send the request twice
+                logger.error(f"LLM API HTTP Error (streamed): {e}")
+                raise
+            except (requests.exceptions.ChunkedEncodingError, ValueError) as e:
+                # Broken stream or an unparsable SSE line: retry once as a plain request
+                logger.warning(f"Streaming LLM call failed ({type(e).__name__}: {e}), retrying without streaming")
+
         url = f"{Config.BASE_URL}/chat/completions"
 
         payload = {
@@ -39,18 +64,11 @@ class BaseAnalyst:
         # Add max_tokens if explicitly needed, but default is usually fine for these models
         # unless strict output control is required. 
 
-        headers = {
-            "Authorization": f"Bearer {Config.API_KEY}",
-            "Content-Type": "application/json",
-            "HTTP-Referer": "https://github.com/bioinformatics-llm",
-            "X-Title": "LLM DB Analyst"
-        }
-
         try:
             response = requests.post(
                 url,
                 json=payload,
-                headers=headers,
+                headers=self._headers(),
                 timeout=self.timeout
             )
             response.raise_for_status()
@@ -64,7 +82,134 @@ class BaseAnalyst:
             logger.error(f"LLM API Error: {str(e)}")
             raise
 
-    def _read_prompt_file(self, filename: str) -> str:
+    def _headers(self) -> Dict[str, str]:
+        """Request headers shared by streamed and non-streamed calls"""
+        return {
+            "Authorization": f"Bearer {Config.API_KEY}",
+            "Content-Type": "application/json",
+            "HTTP-Referer": "https://github.com/bioinformatics-llm",
+            "X-Title": "LLM DB Analyst"
+        }
+
+    def _stream_llm(self, messages: list[Dict[str, str]], temperature: float = 0.2) -> Iterator[str]:
+        """
+        Yield content deltas of a streamed (SSE) chat completion.
+        Closing the generator early closes the HTTP connection, ending generation upstream.
+        A body without any ``data:`` event is parsed as a plain (non-streamed) completion.
+        """
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": temperature,
+            "stream": True
+        }
+        with requests.post(
+            f"{Config.BASE_URL}/chat/completions",
+            json=payload,
+            headers=self._headers(),
+            timeout=self.timeout,
+            stream=True
+        ) as response:
+            response.raise_for_status()
+            body = []  # non-SSE lines, kept until the first data event arrives
+            saw_event = False
+            for line in response.iter_lines():
+                # Blank keep-alives and ": comment" lines carry no data
+                if not line.startswith(b"data:"):
+                    if not saw_event and line and not line.startswith(b":"):
+                        body.append(line)
+                    continue
+                saw_event = True
+                data = line[5:].strip()
+                if data == b"[DONE]":
+                    break
+                chunk = json.loads(data)
+                if 'error' in chunk:
+                    raise RuntimeError(f"LLM stream error: {chunk['error']}")
+                choices = chunk.get('choices') or [{}]
+                delta = (choices[0].get('delta') or {}).get('content')
+                if delta:
+                    yield delta
+
+            if not saw_event:
+                # The endpoint ignored "stream": true; raises ValueError if this is not JSON either
+                result = json.loads(b"\n".join(body))
+                if 'error' in result:
+                    raise RuntimeError(f"LLM error: {result['error']}")
+                try:
+                    content = result['choices'][0]['message']['content']
+                except (KeyError, IndexError, TypeError) as e:
+                    raise ValueError(f"Unrecognized LLM response body: {e!r}") from e
+                if content:
+                    yield content
+
+    def _call_llm_until_code_fence(self, messages: list[Dict[str, str]], temperature: float = 0.2) -> str:
+        """Stream a completion, returning as soon as the first ```python block is closed"""
+        text = ""
+        fence_end = -1  # index just past the opening ```python
+        stream = self._stream_llm(messages, temperature)
+        try:
+            for delta in stream:
+                # A fence may straddle two deltas, so rescan the tail of the previous text
+                start = max(len(text) - len(_CODE_FENCE_OPEN) + 1, 0)
+                text += delta
+                if fence_end < 0:
+                    pos = text.find(_CODE_FENCE_OPEN, start)
+                    if pos < 0:
+                        continue
+                    fence_end = pos + len(_CODE_FENCE_OPEN)
+                if text.find(_CODE_FENCE_CLOSE, max(start, fence_end)) >= 0:
+                    logger.debug(f"Code fence closed after {len(text)} chars; stopping stream")
+                    break
+        finally:
+            stream.close()
+        if not text.strip():
+            # Handled by _call_llm like a broken stream: retried once without streaming
+            raise ValueError("Streamed LLM response contained no content")
+        return text
+
+    def _call_llm_cached(
+        self,
+        messages: list[Dict[str, str]],
+        temperature: float = 0.2,
+        stop_at_code_fence: bool = False
+    ) -> str:
+        """
+        _call_llm with an opt-in on-disk response cache (Config.DATA_ANALYST_LLM_CACHE_DIR).
+
+        The key covers the model, temperature and full message list, so any change
+        to the prompt is a cache miss. Cache read/write problems never fail the call.
+        """
+        if not self.llm_cache.enabled:
+            return self._call_llm(messages, temperature, stop_at_code_fence=stop_at_code_fence)
+
+        key = self.llm_cache.context_digest(self.model, temperature, messages)
+        cached = self.llm_cache.get(key)
+        if isinstance(cached, dict) and isinstance(cached.get('content'), str):
+            logger.info(f"LLM cache hit ({self.model}, key {key[:12]})")
+            return cached['content']
+
+        content = self._call_llm(messages, temperature, stop_at_code_fence=stop_at_code_fence)
+        if not content or not content.strip():
+            # Never pin an empty response: the next run should ask the model again
+            return content
+        try:
+            self.llm_cache.put(key, {'model': self.model, 'content': content})
+        except OSError as e:
+            logger.warning(f"Could not cache LLM response: {e}")
+        return content
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _load_prompts(filename: str) -> Dict[str, str]:
+        """
+        Read and split a prompt file once per process.
+        The returned dict is shared by every instance, so treat it as read-only.
+        """
+        return BaseAnalyst._split_prompts(BaseAnalyst._read_prompt_file(filename))
+
+    @staticmethod
+    def _read_prompt_file(filename: str) -> str:
         """Read a prompt file from the prompts directory relative to this file."""
         # Note: This assumes this file is in src/bio_agents/data_analyst/
         # and prompts are in src/bio_agents/data_analyst/prompts/
@@ -72,7 +217,8 @@ class BaseAnalyst:
         with open(prompt_path, "r", encoding="utf-8") as f:
             return f.read()
 
-    def _split_prompts(self, content: str) -> Dict[str, str]:
+    @staticmethod
+    def _split_prompts(content: str) -> Dict[str, str]:
         """
         Split a consolidated prompt file into sections.
         Format expectation:
@@ -103,6 +249,11 @@ class BaseAnalyst:
                     parts[current_section] = "\n".join(current_content).strip()
                 current_section = "fix_user"
                 current_content = []
+            elif line.strip().startswith("# BATCH_USER"): # For multi-file batch analysis
+                if current_section:
+                    parts[current_section] = "\n".join(current_content).strip()
+                current_section = "batch_user"
+                current_content = []
             else:
                 if current_section:
                     current_content.append(line)
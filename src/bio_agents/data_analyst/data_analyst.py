@@ -6,21 +6,55 @@ Data Analyst Agent
   Stage 3: Summarizer LLM - Generates natural language summary
 """
 
-import json
+import contextvars
 import logging
+import os
 import time
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, List, Optional, Union, Any
+from typing import Dict, List, Optional, Tuple, Union, Any
 import pandas as pd
 
 from src.bio_agents.config import Config
-from .data_utils import DataLoader, FileResolver
+from .data_utils import AnalysisCache, DataLoader, FileResolver, dumps_json, load_json_file
 from .data_executor import CodeExecutor
 from .data_planner import PlannerLLM, AnalysisPlan
 from .data_summarizer import SummarizerLLM
 
 logger = logging.getLogger(__name__)
 
+# Extensions that mark a directory as holding problem data. JSON is deliberately
+# absent: a folder of agent artifacts (JSON only) is treated as "no data".
+_CANDIDATE_DIR_DATA_EXTS = frozenset({
+    ".csv", ".tsv", ".txt", ".tab", ".xlsx", ".xls", ".parquet",
+    ".md", ".markdown",  # Markdown files
+    ".fa", ".fasta", ".fna", ".faa", ".ffn", ".frn",  # FASTA files
+    ".fq", ".fastq",  # FASTQ files (uncompressed)
+    ".gz"
+})
+_DATA_DIR_EXTS = frozenset({
+    ".csv", ".tsv", ".txt", ".tab", ".xlsx", ".xls", ".parquet",
+    ".fastq", ".fasta", ".fa", ".bam", ".sam", ".vcf", ".bed", ".pod5"
+})
+
+# Summarizer input compaction (see DataAnalystAgent._compact_for_summary)
+_SUMMARY_MAX_STR_CHARS = 512
+_SUMMARY_MAX_COLUMNS = 40
+_PLACEHOLDER_BIO = frozenset({"num column", "str column"})
+_PLACEHOLDER_USE = "Use for analysis"
+
+
+def _has_data_suffix(entry: os.DirEntry, extensions: frozenset) -> bool:
+    """Check a directory entry's suffix without building a Path (uses cached d_type)"""
+    if not entry.is_file():
+        return False
+    name = entry.name
+    dot = name.rfind('.')
+    if dot <= 0:
+        return False
+    return name[dot:].lower() in extensions
+
 
 class DataAnalystAgent:
     """
@@ -51,8 +85,19 @@ class DataAnalystAgent:
         # Initialize components using global Config
         self.file_resolver = FileResolver(Config.DATA_DIR)
         self.data_loader = DataLoader()
+        self.analysis_cache = AnalysisCache(Config.DATA_ANALYST_CACHE_DIR)
+        # Integration code generated in this session, keyed by its full LLM prompt
+        self._integration_cache: Dict[str, Dict] = {}
         self.code_executor = CodeExecutor()  # No longer takes config arg
 
+        # Shared worker pool for file preloading and Stage 2 batches (threads start lazily
+        # and are reused across analyze() calls); released by close()
+        self._pool_size = max(1, Config.DATA_ANALYST_MAX_WORKERS)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self._pool_size,
+            thread_name_prefix="DataAnalyst"
+        )
+
         # 3-Stage Pipeline configuration
         self.use_planner = use_planner
         self.use_summarizer = use_summarizer
@@ -71,6 +116,17 @@ class DataAnalystAgent:
         logger.info(f"DataAnalystAgent initialized with data_dir: {Config.DATA_DIR}")
         logger.info(f"Pipeline: Planner={use_planner}, Summarizer={use_summarizer}, Format={output_format}")
 
+    def close(self) -> None:
+        """Shut down the shared worker pool, waiting for in-flight tasks, then release executor resources"""
+        self._executor.shutdown(wait=True)
+        self.code_executor.close()
+
+    def __enter__(self) -> "DataAnalystAgent":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
     def run_for_problem(self, problem_path: Union[str, Path], problem_dir: Union[str, Path, None] = None) -> Dict[str, Any]:
         """
         Standard entry point for the pipeline.
@@ -87,6 +143,10 @@ class DataAnalystAgent:
         """
         start_time = time.time()
         problem_path = Path(problem_path)
+        # Path-derived parts used by Steps 0.5 and 2; each PurePath access re-parses
+        parent = problem_path.parent
+        grandparent = parent.parent
+        stem = problem_path.stem
         logger.info("=" * 80)
         logger.info(f"[DataAnalystAgent] Starting analysis for problem: {problem_path}")
         logger.info(f"[DataAnalystAgent] Problem directory: {problem_dir}")
@@ -95,8 +155,7 @@ class DataAnalystAgent:
         # Load problem JSON (Brain output)
         logger.info(f"[Step 0] Loading Brain output JSON from: {problem_path}")
         load_start = time.time()
-        with open(problem_path, 'r', encoding='utf-8') as f:
-            brain_output = json.load(f)
+        brain_output = load_json_file(problem_path)
         load_time = time.time() - load_start
         logger.info(f"[Step 0] ✓ Loaded Brain output in {load_time:.2f}s")
         logger.info(f"[Step 0]   - Problem ID: {brain_output.get('problem_id', 'unknown')}")
@@ -106,34 +165,38 @@ class DataAnalystAgent:
         # problem_path is the Brain output JSON. In the current pipeline it may live under
         # .../problem_X/01_brain/brain_decomposition.json, while data files live in .../problem_X/.
         logger.info(f"[Step 0.5] Determining problem data directory...")
-        resolver_start = time.time()
         candidate_dirs = []
-        if problem_path.parent.exists():
-            candidate_dirs.append(problem_path.parent)
-            logger.info(f"[Step 0.5]   Candidate 1: {problem_path.parent}")
-        if problem_path.parent.parent.exists() and problem_path.parent.parent != problem_path.parent:
-            candidate_dirs.append(problem_path.parent.parent)
-            logger.info(f"[Step 0.5]   Candidate 2: {problem_path.parent.parent}")
+        if os.path.isdir(parent):
+            candidate_dirs.append(parent)
+            logger.info(f"[Step 0.5]   Candidate 1: {parent}")
+        if grandparent != parent and os.path.isdir(grandparent):
+            candidate_dirs.append(grandparent)
+            logger.info(f"[Step 0.5]   Candidate 2: {grandparent}")
         if problem_dir:
             candidate_dirs.insert(0, Path(problem_dir))
             logger.info(f"[Step 0.5]   Explicit directory (priority): {problem_dir}")
 
+        # problem_dir usually equals grandparent in the pipeline layout; scan each directory once
+        seen_dirs = set()
+        unique_dirs = []
+        for d in candidate_dirs:
+            resolved = d.resolve()
+            if resolved not in seen_dirs:
+                seen_dirs.add(resolved)
+                unique_dirs.append(d)
+        candidate_dirs = unique_dirs
+
         def has_supported_data_files(d: Path) -> bool:
+            # A single scandir both proves the directory is readable and finds data files;
+            # a missing/unreadable directory surfaces as OSError.
             try:
-                file_count = 0
-                for p in d.iterdir():
-                    if p.is_file() and p.suffix.lower() in {
-                        ".csv", ".tsv", ".txt", ".tab", ".xlsx", ".xls", ".json", ".parquet",
-                        ".md", ".markdown",  # Markdown files
-                        ".fa", ".fasta", ".fna", ".faa", ".ffn", ".frn",  # FASTA files
-                        ".fq", ".fastq",  # FASTQ files (uncompressed)
-                        ".gz"
-                    }:
-                        # Treat pure agent artifacts folder as "no data" if it contains only JSON
-                        if p.suffix.lower() != ".json":
-                            file_count += 1
-                logger.info(f"[Step 0.5]   Directory {d}: {file_count} supported data files")
-                return file_count > 0
+                with os.scandir(d) as it:
+                    for entry in it:
+                        if _has_data_suffix(entry, _CANDIDATE_DIR_DATA_EXTS):
+                            logger.info(f"[Step 0.5]   Directory {d}: found supported data file {entry.name}")
+                            return True
+                logger.info(f"[Step 0.5]   Directory {d}: 0 supported data files")
+                return False
             except Exception as e:
                 logger.warning(f"[Step 0.5]   Error checking {d}: {e}")
                 return False
@@ -149,11 +212,10 @@ class DataAnalystAgent:
             chosen_dir = candidate_dirs[0]
             logger.info(f"[Step 0.5]   Using first candidate (no data files found): {chosen_dir}")
 
-        if chosen_dir and chosen_dir.exists():
+        if chosen_dir and os.path.isdir(chosen_dir):
             logger.info(f"[Step 0.5] Initializing FileResolver with directory: {chosen_dir}")
+            # The index is built (and its build time logged) on the first resolve
             self.file_resolver = FileResolver(chosen_dir)
-            resolver_time = time.time() - resolver_start
-            logger.info(f"[Step 0.5] ✓ FileResolver initialized in {resolver_time:.2f}s")
         else:
             logger.warning(f"[Step 0.5] ⚠ No valid directory found, using default FileResolver")
             
@@ -172,16 +234,18 @@ class DataAnalystAgent:
         # Determine the 03_data_analysis directory path
         # problem_path is like .../01_brain/brain_decomposition.json
         # We want to save to .../03_data_analysis/brain_decomposition_analysis.{ext}
-        problem_root = problem_path.parent.parent  # Go up from 01_brain/ to problem_X/
-        data_analysis_dir = problem_root / "03_data_analysis"
+        # grandparent: up from 01_brain/ to problem_X/
+        data_analysis_dir = grandparent / "03_data_analysis"
         data_analysis_dir.mkdir(parents=True, exist_ok=True)
-        output_path = data_analysis_dir / (problem_path.stem + f"_analysis{output_ext}")
+        output_path = data_analysis_dir / f"{stem}_analysis{output_ext}"
         
         logger.info(f"[Step 2]   Output path: {output_path}")
         logger.info(f"[Step 2]   Output format: {self.output_format} ({output_ext})")
-        logger.info(f"[Step 2]   Output size: {len(str(output))} chars")
-        
-        self.save_output(output, output_path)
+        # Serialize once: the same bytes feed the size log and the saved file
+        payload = self._serialize_output(output)
+        logger.info(f"[Step 2]   Output size: {len(payload)} bytes")
+
+        self.save_output(output, output_path, payload=payload)
         save_time = time.time() - save_start
         
         total_time = time.time() - start_time
@@ -206,8 +270,7 @@ class DataAnalystAgent:
         # Load input JSON
         if isinstance(input_json, str):
             input_path = Path(input_json)
-            with open(input_path, 'r', encoding='utf-8') as f:
-                brain_output = json.load(f)
+            brain_output = load_json_file(input_path)
             logger.info(f"Loaded input JSON from: {input_path}")
         else:
             brain_output = input_json
@@ -224,7 +287,7 @@ class DataAnalystAgent:
         # Only use DB_list explicitly provided by BrainAgent, no LLM or regex extraction
         logger.info(f"[DB Collection] Collecting DB_list from sub_problems...")
         logger.info(f"[DB Collection]   Total sub_problems: {len(sub_problems)}")
-        all_db_refs = set()
+        all_db_refs = {}  # insertion-ordered set (values unused)
         active_sub_problems = []
         for idx, sp in enumerate(sub_problems, 1):
             db_flag = sp.get('DB_flag', 0)
@@ -234,16 +297,17 @@ class DataAnalystAgent:
                 active_sub_problems.append(sp)
                 db_list_str = sp.get('DB_list', '')
                 refs = [r.strip() for r in db_list_str.split(',') if r.strip()]
-                all_db_refs.update(refs)
+                all_db_refs.update(dict.fromkeys(refs))
                 logger.info(f"[DB Collection]     ✓ Active (DB_flag=1)")
                 logger.info(f"[DB Collection]     ✓ DB_list: {db_list_str}")
-                logger.info(f"[DB Collection]     ✓ Extracted {len(refs)} references: {refs}")
+                logger.info("[DB Collection]     ✓ Extracted %d references: %s", len(refs), refs)
             else:
                 logger.info(f"[DB Collection]     ⊘ Skipped (DB_flag={db_flag})")
         
         logger.info(f"[DB Collection] ✓ Total active sub_problems: {len(active_sub_problems)}")
         logger.info(f"[DB Collection] ✓ Total unique DB references: {len(all_db_refs)}")
-        logger.info(f"[DB Collection] ✓ References: {sorted(all_db_refs)}")
+        sorted_refs = sorted(all_db_refs)
+        logger.info(f"[DB Collection] ✓ References: {sorted_refs}")
 
         # Check if any active sub_problems exist
         if not active_sub_problems:
@@ -266,7 +330,7 @@ class DataAnalystAgent:
         # Resolve file paths from combined DB_list
         logger.info(f"[File Resolution] Resolving file paths from DB_list...")
         resolve_start = time.time()
-        combined_db_list = ', '.join(sorted(all_db_refs))
+        combined_db_list = ', '.join(sorted_refs)
         logger.info(f"[File Resolution]   Combined DB_list: {combined_db_list}")
         logger.info(f"[File Resolution]   Active sub_problems: {len(active_sub_problems)} of {len(sub_problems)}")
         logger.info(f"[File Resolution]   FileResolver data_dir: {self.file_resolver.data_dir}")
@@ -291,6 +355,21 @@ class DataAnalystAgent:
 
         # ========== Stage 1: Planner LLM ==========
         analysis_plan = None
+        preloaded = None
+        if self.use_planner and not self.analysis_cache.enabled:
+            # File loading does not depend on the plan, so start it in the background
+            # and let it overlap with the Planner LLM round-trip. Preloads are queued
+            # ahead of the Stage 2 batches that wait on them, so the shared pool cannot
+            # deadlock on them. With the analysis cache on, the plan is part of each
+            # file's cache key, so Stage 2 loads only the files it misses instead.
+            preloaded = {
+                file_info['path']: self._executor.submit(
+                    contextvars.copy_context().run,
+                    self.data_loader.load_file, file_info['path'], sample=True
+                )
+                for file_info in resolved_files
+            }
+
         if self.use_planner:
             logger.info("=" * 80)
             logger.info("[Stage 1: Planner LLM] Starting...")
@@ -305,9 +384,9 @@ class DataAnalystAgent:
                 logger.info(f"[Stage 1] ✓ Plan created in {planner_time:.2f}s")
                 logger.info(f"[Stage 1]   Problem type: {analysis_plan.problem_type}")
                 logger.info(f"[Stage 1]   Processing strategy: {analysis_plan.processing_strategy}")
-                logger.info(f"[Stage 1]   File priority: {analysis_plan.file_priority}")
-                logger.info(f"[Stage 1]   Focus areas: {analysis_plan.focus_areas}")
-                logger.info(f"[Stage 1]   Code flow steps: {len(analysis_plan.code_flow)}")
+                logger.info("[Stage 1]   File priority: %s", analysis_plan.file_priority)
+                logger.info("[Stage 1]   Focus areas: %s", analysis_plan.focus_areas)
+                logger.info("[Stage 1]   Code flow steps: %d", len(analysis_plan.code_flow))
             except Exception as e:
                 planner_time = time.time() - planner_start
                 logger.warning(f"[Stage 1] ✗ FAILED in {planner_time:.2f}s: {type(e).__name__}: {e}")
@@ -321,46 +400,84 @@ class DataAnalystAgent:
         logger.info("[Stage 2: Executor] Starting file analysis...")
         logger.info("=" * 80)
         executor_start = time.time()
-        file_analyses = []
 
         # Determine file processing order from plan or use default
         if analysis_plan and analysis_plan.file_priority:
-            logger.info(f"[Stage 2] Using file priority from plan: {analysis_plan.file_priority}")
-            file_order = {name: idx for idx, name in enumerate(analysis_plan.file_priority)}
-            resolved_files_ordered = sorted(
-                resolved_files,
-                key=lambda f: file_order.get(f['name'], len(file_order))
-            )
+            logger.info("[Stage 2] Using file priority from plan: %s", analysis_plan.file_priority)
+            resolved_names = [f['name'] for f in resolved_files]
+            if resolved_names == analysis_plan.file_priority[:len(resolved_names)]:
+                # Plan already matches resolver order; nothing to sort
+                resolved_files_ordered = resolved_files
+            else:
+                file_order = {name: idx for idx, name in enumerate(analysis_plan.file_priority)}
+                unranked = len(file_order)
+                resolved_files_ordered = sorted(
+                    resolved_files,
+                    key=lambda f: file_order.get(f['name'], unranked)
+                )
         else:
             logger.info(f"[Stage 2] Using default file order (no plan priority)")
             resolved_files_ordered = resolved_files
 
-        logger.info(f"[Stage 2] Processing {len(resolved_files_ordered)} files...")
-        for file_idx, file_info in enumerate(resolved_files_ordered, 1):
-            file_start = time.time()
-            logger.info(f"[Stage 2] [{file_idx}/{len(resolved_files_ordered)}] Processing: {file_info['name']}")
-            logger.info(f"[Stage 2]   File path: {file_info['path']}")
+        total_files = len(resolved_files_ordered)
+        batch_size = max(1, Config.DATA_EXECUTOR_BATCH_SIZE)
+        batches = [
+            list(range(i, min(i + batch_size, total_files)))
+            for i in range(0, total_files, batch_size)
+        ]
+        # Batches share the pool with any file preloads still running, so this is an upper bound
+        logger.info(f"[Stage 2] Processing {total_files} files "
+                    f"(batches: {len(batches)}, batch size: {batch_size}, pool size: {self._pool_size})...")
+
+        # Each batch is an independent, I/O-bound LLM round-trip, so dispatch them
+        # concurrently. Results are stored by submission index to keep the planned order.
+        # Each task runs in a copy of the caller's context so context-local state
+        # (e.g. stdout suppression in main.py) carries over to the worker threads.
+        # Everything besides the file bytes that shapes the executor prompt
+        cache_context = None
+        if self.analysis_cache.enabled:
+            cache_context = self.analysis_cache.context_digest(
+                vars(analysis_plan) if analysis_plan else None,
+                brain_output,
+                Config.MODEL_DATA_EXECUTOR
+            )
+
+        file_analyses = [None] * total_files
+        pool = self._executor
+        future_to_batch = {}
+        for batch in batches:
+            batch_files = [resolved_files_ordered[i] for i in batch]
+            for file_idx in batch:
+                file_info = resolved_files_ordered[file_idx]
+                logger.info(f"[Stage 2] [{file_idx + 1}/{total_files}] Submitting: {file_info['name']}")
+                logger.info(f"[Stage 2]   File path: {file_info['path']}")
+            future = pool.submit(
+                contextvars.copy_context().run,
+                self._analyze_file_batch, batch_files, brain_output, analysis_plan, cache_context,
+                preloaded
+            )
+            future_to_batch[future] = batch
 
+        for future in as_completed(future_to_batch):
+            batch = future_to_batch[future]
+            file_time = time.time() - executor_start
             try:
-                analysis = self._analyze_single_file(file_info, brain_output, analysis_plan)
-                file_analyses.append(analysis)
-                file_time = time.time() - file_start
-                logger.info(f"[Stage 2]   ✓ Completed in {file_time:.2f}s")
-                logger.info(f"[Stage 2]   ✓ Analysis result: type={analysis.get('type', 'unknown')}, "
-                           f"rows={analysis.get('rows', 'unknown')}, columns={len(analysis.get('columns', []))}")
+                batch_results = future.result()
             except Exception as e:
-                file_time = time.time() - file_start
-                logger.error(f"[Stage 2]   ✗ FAILED in {file_time:.2f}s")
-                logger.error(f"[Stage 2]   ✗ Error: {type(e).__name__}: {str(e)}")
-                import traceback
-                logger.error(f"[Stage 2]   ✗ Traceback:\n{traceback.format_exc()}")
-                file_analyses.append({
-                    'file_path': file_info['path'],
-                    'file_name': file_info['name'],
-                    'status': 'error',
-                    'error': str(e)
-                })
-        
+                logger.error(f"[Stage 2]   ✗ Batch FAILED: {type(e).__name__}: {str(e)}")
+                batch_results = [self._file_error(resolved_files_ordered[i], e) for i in batch]
+
+            for file_idx, analysis in zip(batch, batch_results):
+                file_info = resolved_files_ordered[file_idx]
+                file_analyses[file_idx] = analysis
+                if 'error' in analysis:
+                    logger.error(f"[Stage 2] [{file_idx + 1}/{total_files}] ✗ {file_info['name']} FAILED at +{file_time:.2f}s")
+                    logger.error(f"[Stage 2]   ✗ Error: {analysis['error']}")
+                else:
+                    logger.info(f"[Stage 2] [{file_idx + 1}/{total_files}] ✓ {file_info['name']} completed at +{file_time:.2f}s")
+                    logger.info(f"[Stage 2]   ✓ Analysis result: type={analysis.get('type', 'unknown')}, "
+                               f"rows={analysis.get('rows', 'unknown')}, columns={len(analysis.get('columns', []))}")
+
         executor_time = time.time() - executor_start
         successful = len([a for a in file_analyses if 'error' not in a])
         failed = len([a for a in file_analyses if 'error' in a])
@@ -390,15 +507,18 @@ class DataAnalystAgent:
             summarizer_start = time.time()
             try:
                 logger.info(f"[Stage 3]   Model: {Config.MODEL_DATA_SUMMARIZER}")
-                logger.info(f"[Stage 3]   Input: {len(str(execution_results))} chars")
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info(f"[Stage 3]   Input: {len(dumps_json(execution_results))} bytes (JSON)")
                 # Enhanced context with sub_problems array for integrated analysis
                 enhanced_context = {
                     **brain_output,
                     'sub_problems': sub_problems,
                     'active_sub_problems': active_sub_problems
                 }
+                # Keep the full execution_results for JSON output; the summarizer only
+                # needs a compact view, which keeps its prompt (and prefill time) small.
                 summary = self.summarizer.summarize(
-                    execution_results=execution_results,
+                    execution_results=self._compact_for_summary(execution_results),
                     problem_context=enhanced_context,
                     analysis_plan=analysis_plan
                 )
@@ -410,8 +530,8 @@ class DataAnalystAgent:
                 summarizer_time = time.time() - summarizer_start
                 logger.warning(f"[Stage 3] ✗ FAILED in {summarizer_time:.2f}s: {type(e).__name__}: {e}")
                 logger.warning(f"[Stage 3]   Returning JSON output instead")
-                import traceback
-                logger.warning(f"[Stage 3]   Traceback:\n{traceback.format_exc()}")
+                if logger.isEnabledFor(logging.WARNING):
+                    logger.warning(f"[Stage 3]   Traceback:\n{traceback.format_exc()}")
                 return execution_results
         else:
             if not self.use_summarizer:
@@ -421,32 +541,139 @@ class DataAnalystAgent:
 
         return execution_results
 
-    def _analyze_single_file(
+    def _analyze_file_batch(
         self,
-        file_info: Dict,
+        file_infos: List[Dict],
         brain_output: Dict,
-        analysis_plan: Optional[AnalysisPlan] = None
-    ) -> Dict:
+        analysis_plan: Optional[AnalysisPlan] = None,
+        cache_context: Optional[str] = None,
+        preloaded: Optional[Dict[str, Future]] = None
+    ) -> List[Dict]:
         """
-        Analyze a single file - produces compact output for LLM prompt insertion
+        Analyze a group of files, sharing a single executor LLM call when possible
+
+        Files with a cached result are skipped. Falls back to per-file analysis
+        when the batched response is unusable.
 
         Args:
-            file_info: File information from resolver
+            file_infos: File information from resolver
             brain_output: Full Brain module output for context
             analysis_plan: Optional analysis plan from Planner stage
+            cache_context: Digest of the analysis context; None disables the result cache
+            preloaded: Optional file path -> future of a background ``load_file`` call
 
         Returns:
-            Compact analysis result for this file (no sample data)
+            One compact analysis result (or error entry) per file, in input order
         """
+        results: List[Optional[Dict]] = [None] * len(file_infos)
+        cache_keys: List[Optional[str]] = [None] * len(file_infos)
+        if cache_context is not None:
+            for pos, file_info in enumerate(file_infos):
+                try:
+                    cache_keys[pos] = self.analysis_cache.key_for(file_info['path'], cache_context)
+                except OSError as e:
+                    logger.warning(f"[File Analysis]   ⚠ Could not hash {file_info['name']} for cache: {e}")
+                    continue
+                cached = self.analysis_cache.get(cache_keys[pos])
+                if cached is not None:
+                    logger.info(f"[File Analysis] ✓ Cache hit: {file_info['name']}")
+                    results[pos] = cached
+
+        pending = [pos for pos, result in enumerate(results) if result is None]
+        # Files whose executor run failed still get a result built from loader
+        # metadata, but it must not be served from the cache on later runs
+        failed = set()
+        if len(pending) == 1:
+            pos = pending[0]
+            try:
+                df, metadata = self._load_file_for_analysis(file_infos[pos], preloaded)
+                llm_analysis = self._run_file_analysis(df, metadata, brain_output, analysis_plan)
+                if self._analysis_failed(llm_analysis):
+                    failed.add(pos)
+                results[pos] = self._build_file_result(df, metadata, llm_analysis)
+            except Exception as e:
+                results[pos] = self._file_error(file_infos[pos], e)
+        elif pending:
+            loaded = []
+            for pos in pending:
+                try:
+                    df, metadata = self._load_file_for_analysis(file_infos[pos], preloaded)
+                    loaded.append((pos, df, metadata))
+                except Exception as e:
+                    results[pos] = self._file_error(file_infos[pos], e)
+
+            llm_analyses = None
+            if len(loaded) > 1:
+                logger.info(f"[File Analysis] Running batched LLM analysis for {len(loaded)} files...")
+                logger.info(f"[File Analysis]   Model: {Config.MODEL_DATA_EXECUTOR}")
+                analysis_start = time.time()
+                llm_analyses = self.code_executor.analyze_data_batch(
+                    df_list=[df for _, df, _ in loaded],
+                    file_info_list=[metadata for _, _, metadata in loaded],
+                    problem_context=brain_output,
+                    analysis_plan=analysis_plan
+                )
+                analysis_time = time.time() - analysis_start
+                if llm_analyses is None:
+                    logger.warning(f"[File Analysis]   ⚠ Batched analysis unusable after {analysis_time:.2f}s, "
+                                   f"falling back to per-file analysis")
+                else:
+                    logger.info(f"[File Analysis]   ✓ Batched LLM analysis completed in {analysis_time:.2f}s")
+
+            # The per-file fallback runs sequentially: this is already a Stage 2 pool worker,
+            # and a nested pool would push concurrent executor LLM calls past
+            # DATA_ANALYST_MAX_WORKERS
+            for i, (pos, df, metadata) in enumerate(loaded):
+                try:
+                    if llm_analyses is not None:
+                        llm_analysis = llm_analyses[i]
+                    else:
+                        llm_analysis = self._run_file_analysis(df, metadata, brain_output, analysis_plan)
+                    if self._analysis_failed(llm_analysis):
+                        failed.add(pos)
+                    results[pos] = self._build_file_result(df, metadata, llm_analysis)
+                except Exception as e:
+                    results[pos] = self._file_error(file_infos[pos], e)
+
+        for pos in pending:
+            if cache_keys[pos] and pos not in failed and 'error' not in results[pos]:
+                try:
+                    self.analysis_cache.put(cache_keys[pos], results[pos])
+                except OSError as e:
+                    logger.warning(f"[File Analysis]   ⚠ Could not cache result for {file_infos[pos]['name']}: {e}")
+
+        return results
+
+    def _file_error(self, file_info: Dict, error: Exception) -> Dict:
+        """Log a per-file failure and build the error entry used in Stage 2 results"""
+        logger.error(f"[File Analysis]   ✗ {file_info['name']}: {type(error).__name__}: {error}")
+        if logger.isEnabledFor(logging.ERROR):
+            logger.error(f"[File Analysis]   ✗ Traceback:\n{traceback.format_exc()}")
+        return {
+            'file_path': file_info['path'],
+            'file_name': file_info['name'],
+            'status': 'error',
+            'error': str(error)
+        }
+
+    def _load_file_for_analysis(
+        self,
+        file_info: Dict,
+        preloaded: Optional[Dict[str, Future]] = None
+    ) -> Tuple[pd.DataFrame, Dict]:
+        """Load a sampled DataFrame and metadata for a resolved file, reusing a preload if present"""
         file_path = file_info['path']
         file_name = file_info['name']
+        future = preloaded.get(file_path) if preloaded else None
 
-        # Load data
         logger.info(f"[File Analysis] Loading data file: {file_name}")
         logger.info(f"[File Analysis]   Path: {file_path}")
         load_start = time.time()
         try:
-            df, metadata = self.data_loader.load_file(file_path, sample=True)
+            if future is not None:
+                df, metadata = future.result()
+            else:
+                df, metadata = self.data_loader.load_file(file_path, sample=True)
             load_time = time.time() - load_start
             logger.info(f"[File Analysis]   ✓ Loaded in {load_time:.2f}s")
             logger.info(f"[File Analysis]   ✓ Rows: {metadata['loaded_rows']} (total: {metadata.get('total_rows', 'unknown')})")
@@ -458,10 +685,20 @@ class DataAnalystAgent:
             load_time = time.time() - load_start
             logger.error(f"[File Analysis]   ✗ Load FAILED in {load_time:.2f}s")
             logger.error(f"[File Analysis]   ✗ Error: {type(e).__name__}: {e}")
-            import traceback
-            logger.error(f"[File Analysis]   ✗ Traceback:\n{traceback.format_exc()}")
+            if logger.isEnabledFor(logging.ERROR):
+                logger.error(f"[File Analysis]   ✗ Traceback:\n{traceback.format_exc()}")
             raise
 
+        return df, metadata
+
+    def _run_file_analysis(
+        self,
+        df: pd.DataFrame,
+        metadata: Dict,
+        brain_output: Dict,
+        analysis_plan: Optional[AnalysisPlan] = None
+    ) -> Any:
+        """Run the executor LLM on an already loaded file and return its raw output"""
         # Run LLM analysis with optional plan context
         logger.info(f"[File Analysis] Running LLM analysis...")
         logger.info(f"[File Analysis]   Model: {Config.MODEL_DATA_EXECUTOR}")
@@ -476,13 +713,21 @@ class DataAnalystAgent:
         )
         analysis_time = time.time() - analysis_start
         logger.info(f"[File Analysis]   ✓ LLM analysis completed in {analysis_time:.2f}s")
-        
+        return llm_analysis
+
+    @staticmethod
+    def _analysis_failed(llm_analysis: Any) -> bool:
+        """Whether executor output is a failure rather than a usable analysis"""
+        return not isinstance(llm_analysis, dict) or 'error' in llm_analysis
+
+    def _build_file_result(self, df: pd.DataFrame, metadata: Dict, llm_analysis: Any) -> Dict:
+        """Merge executor output with loader metadata into the compact per-file result"""
         # Safety check: ensure llm_analysis is a dictionary
         if not isinstance(llm_analysis, dict):
             logger.error(f"[File Analysis]   ✗ Executor returned non-dict result")
             logger.error(f"[File Analysis]   ✗ Type: {type(llm_analysis)}, Value: {llm_analysis}")
             llm_analysis = {"error": str(llm_analysis)}
-        else:
+        elif logger.isEnabledFor(logging.INFO):
             logger.info(f"[File Analysis]   ✓ Analysis keys: {list(llm_analysis.keys())}")
             logger.info(f"[File Analysis]   ✓ Data type: {llm_analysis.get('data_type', 'unknown')}")
             logger.info(f"[File Analysis]   ✓ Key columns: {llm_analysis.get('key_columns', [])}")
@@ -530,8 +775,11 @@ class DataAnalystAgent:
                 llm_lookup[col] = {'name': col}
         enriched = []
 
-        for col in df.columns:
-            dtype = 'num' if pd.api.types.is_numeric_dtype(df[col]) else 'str'
+        # Classify dtypes in one pass over df.dtypes instead of materializing each column
+        num_mask = [pd.api.types.is_numeric_dtype(d) for d in df.dtypes.values]
+
+        for i, col in enumerate(df.columns.to_list()):
+            dtype = 'num' if num_mask[i] else 'str'
             llm_col = llm_lookup.get(col, {})
 
             col_info = {
@@ -551,15 +799,50 @@ class DataAnalystAgent:
 
         return enriched
 
+    @classmethod
+    def _compact_for_summary(cls, obj: Any) -> Any:
+        """
+        Build a compact copy of execution results for the Summarizer prompt
+
+        Long strings are truncated, placeholder column descriptions are dropped,
+        and long column lists are replaced by a sample plus the total count.
+        """
+        if isinstance(obj, dict):
+            compact = {}
+            for key, value in obj.items():
+                if key == 'columns' and isinstance(value, list) and all(isinstance(c, dict) for c in value):
+                    columns = [cls._compact_column(c) for c in value]
+                    if len(columns) > _SUMMARY_MAX_COLUMNS:
+                        compact['columns_sample'] = columns[:_SUMMARY_MAX_COLUMNS]
+                        compact['columns_total'] = len(columns)
+                    else:
+                        compact['columns'] = columns
+                else:
+                    compact[key] = cls._compact_for_summary(value)
+            return compact
+        if isinstance(obj, list):
+            return [cls._compact_for_summary(v) for v in obj]
+        if isinstance(obj, str) and len(obj) > _SUMMARY_MAX_STR_CHARS:
+            return obj[:_SUMMARY_MAX_STR_CHARS] + "... (truncated)"
+        return obj
+
+    @classmethod
+    def _compact_column(cls, column: Dict) -> Dict:
+        """Drop the default bio/use placeholders added by _build_enriched_columns"""
+        compact = {}
+        for key, value in column.items():
+            if key == 'bio' and value in _PLACEHOLDER_BIO:
+                continue
+            if key == 'use' and value == _PLACEHOLDER_USE:
+                continue
+            compact[key] = cls._compact_for_summary(value)
+        return compact
+
     def _has_supported_data_files(self, d: Path) -> bool:
         """Check if directory contains supported data files"""
         try:
-            for p in d.iterdir():
-                if p.is_file() and p.suffix.lower() in {".csv", ".tsv", ".txt", ".tab", ".xlsx", ".xls", ".json", ".parquet", ".fastq", ".fasta", ".fa", ".bam", ".sam", ".vcf", ".bed", ".pod5"}:
-                    # Treat pure agent artifacts folder as "no data" if it contains only JSON
-                    if p.suffix.lower() != ".json":
-                        return True
-            return False
+            with os.scandir(d) as it:
+                return any(_has_data_suffix(entry, _DATA_DIR_EXTS) for entry in it)
         except Exception:
             return False
 
@@ -595,7 +878,7 @@ class DataAnalystAgent:
         prompt = f"""Generate Python code to integrate these data files:
 
 Files:
-{json.dumps([{'file': f['file'], 'type': f['type'], 'keys': f.get('keys', [])} for f in file_analyses], indent=2)}
+{dumps_json([{'file': f['file'], 'type': f['type'], 'keys': f.get('keys', [])} for f in file_analyses]).decode('utf-8')}
 
 Integration Strategy:
 - Join key: {strategy.get('join_key', 'unknown')}
@@ -605,23 +888,33 @@ Integration Strategy:
 Problem Context: {brain_output.get('sub_problem', {}).get('description', '')}
 
 Generate code that:
-1. Loads each file
-2. Merges them on the join key
+1. Loads each file once into a list: `dfs = [<read file> for f in files]`
+2. Combines them in a single pass, never by growing a DataFrame inside a loop:
+   - joins: `functools.reduce(lambda left, right: left.merge(right, on=<join key>, how=<join type>, validate=<relationship>), dfs)`,
+     with `validate` set to the expected key relationship (e.g. 'm:1' for lookup tables, '1:1' for per-gene tables)
+   - vertical union of same-schema files: one `pd.concat(dfs, axis=0, ignore_index=True)`
 3. Saves the result to 'integrated_data.csv'
 
 Output the code as a single Python script. Use pandas as pd.
 """
+        # Same files, schema keys, strategy and context -> same prompt -> reuse the code
+        cached = self._integration_cache.get(prompt)
+        if cached is not None:
+            logger.info("Reusing integration code generated earlier in this session")
+            return dict(cached)
 
         try:
-            response = self.code_executor._call_llm(prompt)
+            response = self.code_executor._call_llm_cached([{"role": "user", "content": prompt}])
             code = self.code_executor._extract_code(response)
 
-            return {
+            integration_info = {
                 'code': code,
                 'join_key': strategy.get('join_key'),
                 'files': [f['file'] for f in file_analyses],
                 'description': f"Integration of {len(file_analyses)} files on {strategy.get('join_key')}"
             }
+            self._integration_cache[prompt] = integration_info
+            return dict(integration_info)
         except Exception as e:
             logger.warning(f"Failed to generate integration code: {e}")
             return None
@@ -661,25 +954,44 @@ Output the code as a single Python script. Use pandas as pd.
 
         return output
 
-    def save_output(self, output: Union[str, Dict], output_path: Union[str, Path]) -> None:
+    @staticmethod
+    def _serialize_output(output: Union[str, Dict]) -> bytes:
+        """Encode analysis output exactly as save_output writes it"""
+        if isinstance(output, str):
+            return output.encode('utf-8')
+        return dumps_json(output)
+
+    def save_output(
+        self,
+        output: Union[str, Dict],
+        output_path: Union[str, Path],
+        payload: Optional[bytes] = None
+    ) -> None:
         """
         Save analysis output to file
 
         Args:
             output: Analysis output (dict for JSON, str for natural language)
             output_path: Path to save file
+            payload: Pre-serialized output from _serialize_output, to avoid encoding twice
         """
         output_path = Path(output_path)
         output_path.parent.mkdir(parents=True, exist_ok=True)
 
-        if isinstance(output, str):
-            # Natural language output - save as text/markdown
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(output)
-        else:
-            # JSON output
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(output, f, indent=2, ensure_ascii=False)
+        if payload is None:
+            payload = self._serialize_output(output)
+
+        # Natural language output is saved as UTF-8 text/markdown, dicts as JSON.
+        # Write to a sibling temp file and swap it in, so readers never see a partial file.
+        tmp_path = output_path.with_name(output_path.name + '.tmp')
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, output_path)
+        except Exception:
+            if tmp_path.exists():
+                tmp_path.unlink()
+            raise
 
         logger.info(f"Output saved to: {output_path}")
 
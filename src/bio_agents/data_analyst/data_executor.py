@@ -3,13 +3,18 @@ Code Executor Module
 Stage 2: Generates and executes Python code for data analysis
 """
 
+import ast
+import contextvars
+import os
+import re
 import sys
-import io
+import functools
+import threading
 import pandas as pd
 import numpy as np
 import logging
 import traceback
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, TextIO, Tuple
 from pathlib import Path
 
 from src.bio_agents.config import Config
@@ -18,6 +23,66 @@ from .data_planner import AnalysisPlan
 
 logger = logging.getLogger(__name__)
 
+# Code fences in LLM responses: a ```python block wins over any other fence.
+# An unterminated fence runs to the end of the text.
+_PYTHON_FENCE_RE = re.compile(r'```python(.*?)(?:```|\Z)', re.DOTALL)
+_ANY_FENCE_RE = re.compile(r'```(.*?)(?:```|\Z)', re.DOTALL)
+
+
+# Per-context stdout target while LLM code runs (None = pass through to the real stdout).
+# sys.stdout is wrapped once by _ExecStdoutRouter instead of being swapped per call:
+# swapping a process-wide global from concurrent Stage 2 threads can restore the wrong
+# stream and leave stdout pointing at a dead buffer. Same approach as main.py's router.
+_exec_stdout = contextvars.ContextVar("exec_stdout", default=None)
+_exec_stdout_lock = threading.Lock()
+
+
+class _ExecStdoutRouter:
+    """sys.stdout wrapper that sends writes to the current context's _exec_stdout target"""
+
+    def __init__(self, target):
+        self._target = target
+
+    def write(self, s: str) -> int:
+        sink = _exec_stdout.get()
+        return (sink if sink is not None else self._target).write(s)
+
+    def flush(self) -> None:
+        sink = _exec_stdout.get()
+        (sink if sink is not None else self._target).flush()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._target, name)
+
+
+def _install_exec_stdout_router() -> None:
+    """Wrap sys.stdout with _ExecStdoutRouter (idempotent; re-wraps if stdout was replaced)"""
+    if isinstance(sys.stdout, _ExecStdoutRouter):
+        return
+    with _exec_stdout_lock:
+        if not isinstance(sys.stdout, _ExecStdoutRouter):
+            sys.stdout = _ExecStdoutRouter(sys.stdout)
+
+
+# Builtins through which executed code can reach scope variables without naming them
+_DYNAMIC_SCOPE_NAMES = frozenset({'globals', 'locals', 'vars', 'eval', 'exec'})
+
+
+@functools.lru_cache(maxsize=128)
+def _compile_code(code: str) -> Tuple[Any, frozenset]:
+    """
+    Parse and byte-compile LLM-generated code once per distinct source string
+
+    Returns (code object, names referenced anywhere in the code); a SyntaxError is
+    raised before anything runs. Identical code recurs across fix retries, batch
+    fallbacks and cached LLM responses; the '<executor>' filename also labels
+    tracebacks from this code.
+    """
+    tree = ast.parse(code, filename='<executor>')
+    used_names = frozenset(node.id for node in ast.walk(tree) if isinstance(node, ast.Name))
+    return compile(tree, '<executor>', 'exec'), used_names
+
+
 class CodeExecutor(BaseAnalyst):
     """
     Stage 2: Code Executor
@@ -30,8 +95,26 @@ class CodeExecutor(BaseAnalyst):
         super().__init__(model=Config.MODEL_DATA_EXECUTOR)
         
         # Load consolidated prompts
-        prompt_content = self._read_prompt_file("executor_prompts.md")
-        self.prompts = self._split_prompts(prompt_content)
+        self.prompts = self._load_prompts("executor_prompts.md")
+
+        # Prints from executed code are never read; they go to the null device (buffered
+        # in C, no growing in-memory copy). Opened on first use, released by close().
+        self._discard_stdout: Optional[TextIO] = None
+        self._discard_stdout_lock = threading.Lock()
+
+    def close(self) -> None:
+        """Close the null-device sink used for stdout of executed code"""
+        with self._discard_stdout_lock:
+            if self._discard_stdout is not None:
+                self._discard_stdout.close()
+                self._discard_stdout = None
+
+    def _get_discard_stdout(self) -> TextIO:
+        """Open the null-device sink once per executor; Stage 2 threads share it"""
+        with self._discard_stdout_lock:
+            if self._discard_stdout is None:
+                self._discard_stdout = open(os.devnull, 'w', encoding='utf-8')
+            return self._discard_stdout
 
     def analyze_data(
         self,
@@ -93,6 +176,123 @@ class CodeExecutor(BaseAnalyst):
         
         return result
 
+    def analyze_data_batch(
+        self,
+        df_list: List[pd.DataFrame],
+        file_info_list: List[Dict],
+        problem_context: Dict,
+        analysis_plan: Optional[AnalysisPlan] = None
+    ) -> Optional[List[Dict]]:
+        """
+        Analyze several files with a single code-generation round-trip
+
+        Returns:
+            One result dict per file (same order as inputs), or None when the batched
+            code fails or its result does not match the expected structure, so the
+            caller can fall back to per-file analysis.
+        """
+        import time
+        file_names = [info.get('file_name', 'unknown') for info in file_info_list]
+        logger.info(f"[CodeExecutor] Starting batched analysis for {len(file_names)} files: {file_names}")
+
+        prompt = self._create_batch_prompt(file_info_list, problem_context, analysis_plan)
+        logger.info(f"[CodeExecutor]   Prompt length: {len(prompt)} chars")
+
+        messages = [
+            {"role": "system", "content": self.prompts['system']},
+            {"role": "user", "content": prompt}
+        ]
+
+        code_gen_start = time.time()
+        code = self._generate_code(messages)
+        code_gen_time = time.time() - code_gen_start
+        if not code:
+            logger.warning(f"[CodeExecutor] ✗ Batched code generation FAILED")
+            return None
+        logger.info(f"[CodeExecutor]   ✓ Batched code generated in {code_gen_time:.2f}s ({len(code)} chars)")
+
+        batch_scope = {
+            "dfs": df_list,
+            "file_names": file_names,
+            "file_paths": [str(info.get('file_path', '')) for info in file_info_list],
+        }
+        try:
+            local_scope = self._execute_code_safely(code, None, {}, extra_scope=batch_scope)
+        except Exception as e:
+            logger.warning(f"[CodeExecutor]   ✗ Batched execution FAILED: {type(e).__name__}: {e}")
+            return None
+
+        results = self._validate_batch_result(local_scope.get('result'), file_names)
+        if results is None:
+            logger.warning(f"[CodeExecutor]   ✗ Batched result failed validation")
+        return results
+
+    @staticmethod
+    def _validate_batch_result(result: Any, file_names: List[str]) -> Optional[List[Dict]]:
+        """
+        Check a batched `result` against the per-file structure; return per-file dicts or None
+
+        Entry i must name file_names[i] in its "file" field, so a reordered, renamed or
+        dropped entry can never have its analysis attached to another file.
+        """
+        if not isinstance(result, dict):
+            return None
+        files = result.get('files')
+        if not isinstance(files, list) or len(files) != len(file_names):
+            return None
+        for entry, expected_name in zip(files, file_names):
+            if not isinstance(entry, dict) or 'error' in entry:
+                return None
+            if not isinstance(entry.get('columns', []), list):
+                return None
+            if entry.get('file') != expected_name:
+                logger.warning(f"[CodeExecutor]   ✗ Batched entry for '{expected_name}' "
+                               f"is labelled '{entry.get('file')}'")
+                return None
+        return files
+
+    def _format_plan_context(self, analysis_plan: Optional[AnalysisPlan]) -> str:
+        """Format planner output for inclusion in executor prompts"""
+        if not analysis_plan:
+            return ""
+        return f"""
+Analysis Plan (from Planner stage):
+- Problem Type: {analysis_plan.problem_type}
+- Processing Strategy: {analysis_plan.processing_strategy}
+- Focus Areas: {', '.join(analysis_plan.focus_areas)}
+- Analysis Approach: {analysis_plan.analysis_approach}
+- Code Flow: {'; '.join(analysis_plan.code_flow)}
+"""
+
+    def _create_batch_prompt(
+        self,
+        file_info_list: List[Dict],
+        problem_context: Dict,
+        analysis_plan: Optional[AnalysisPlan] = None
+    ) -> str:
+        """Create prompt for multi-file analysis code generation"""
+        sub_problem = problem_context.get('sub_problem', {})
+
+        file_blocks = []
+        for i, file_info in enumerate(file_info_list):
+            columns = file_info.get('columns', [])
+            file_blocks.append(
+                f"### FILE {i} ###\n"
+                f"- **Variable**: `dfs[{i}]`\n"
+                f"- **Filename**: `{file_info.get('file_name', 'unknown')}`\n"
+                f"- **Rows**: {file_info.get('total_rows', 'unknown')}\n"
+                f"- **Columns**: {[col.get('name') for col in columns]}\n\n"
+                f"**Column Sampling**:\n{self._format_column_info(columns)}\n"
+            )
+
+        return self.prompts['batch_user'].format(
+            sub_problem_title=sub_problem.get('title', 'Data Analysis'),
+            sub_problem_description=sub_problem.get('description', ''),
+            plan_context=self._format_plan_context(analysis_plan),
+            file_count=len(file_info_list),
+            file_blocks="\n".join(file_blocks)
+        )
+
     def _create_analysis_prompt(
         self,
         file_info: Dict,
@@ -111,16 +311,7 @@ class CodeExecutor(BaseAnalyst):
         columns = file_info.get('columns', [])
 
         # Build plan context if available
-        plan_context = ""
-        if analysis_plan:
-            plan_context = f"""
-Analysis Plan (from Planner stage):
-- Problem Type: {analysis_plan.problem_type}
-- Processing Strategy: {analysis_plan.processing_strategy}
-- Focus Areas: {', '.join(analysis_plan.focus_areas)}
-- Analysis Approach: {analysis_plan.analysis_approach}
-- Code Flow: {'; '.join(analysis_plan.code_flow)}
-"""
+        plan_context = self._format_plan_context(analysis_plan)
 
         return self.prompts['user'].format(
             sub_problem_title=sub_problem_title,
@@ -137,7 +328,7 @@ Analysis Plan (from Planner stage):
         """Call LLM to generate code"""
         try:
             # Use lower temperature for code generation
-            response = self._call_llm(messages, temperature=0.1)
+            response = self._call_llm_cached(messages, temperature=0.1, stop_at_code_fence=True)
             return self._extract_code(response)
         except Exception as e:
             logger.error(f"Code generation failed: {e}")
@@ -145,11 +336,8 @@ Analysis Plan (from Planner stage):
 
     def _extract_code(self, text: str) -> str:
         """Extract code from markdown block"""
-        if "```python" in text:
-            return text.split("```python")[1].split("```")[0].strip()
-        elif "```" in text:
-            return text.split("```")[1].strip()
-        return text.strip()
+        match = _PYTHON_FENCE_RE.search(text) or _ANY_FENCE_RE.search(text)
+        return (match.group(1) if match else text).strip()
 
     def _execute_and_fix(
         self,
@@ -235,16 +423,28 @@ Analysis Plan (from Planner stage):
 
         try:
             # Low temp for fixes
-            response = self._call_llm(messages, temperature=0.1)
+            response = self._call_llm(messages, temperature=0.1, stop_at_code_fence=True)
             return self._extract_code(response)
         except Exception as e:
             logger.error(f"Fix code generation failed: {e}")
             return ""
 
-    def _execute_code_safely(self, code: str, df: pd.DataFrame, file_info: Dict) -> Dict:
+    def _execute_code_safely(
+        self,
+        code: str,
+        df: Optional[pd.DataFrame],
+        file_info: Dict,
+        extra_scope: Optional[Dict[str, Any]] = None
+    ) -> Dict:
         """
         Execute code in a restricted namespace
+
+        Args:
+            extra_scope: Additional variables to inject (e.g. `dfs` for batched analysis)
         """
+        # Syntax errors surface here, before any scope or stdout setup
+        code_obj, used_names = _compile_code(code)
+
         # Define allowed modules
         file_path = file_info.get("file_path") or file_info.get("path") or ""
         file_name = file_info.get("file_name") or file_info.get("name") or ""
@@ -260,27 +460,35 @@ Analysis Plan (from Planner stage):
             "file_name": str(file_name),
             "Path": Path,
         }
+        if extra_scope:
+            allowed_scope.update(extra_scope)
+        if not used_names & _DYNAMIC_SCOPE_NAMES:
+            # Inject only what the code references; 'result' is always seeded
+            allowed_scope = {
+                name: value for name, value in allowed_scope.items()
+                if name in used_names or name == "result"
+            }
         
-        # Capture stdout
-        old_stdout = sys.stdout
-        sys.stdout = io.StringIO()
+        # Silence stdout for this context only (see _ExecStdoutRouter)
+        _install_exec_stdout_router()
+        token = _exec_stdout.set(self._get_discard_stdout())
         
         try:
             # We use exec() here. In a production environment, this should be sandboxed (e.g., Docker)
             # For this local agent, we rely on the restricted globals/locals
             # IMPORTANT: use the same dict for globals/locals so that functions defined in the
             # executed code can still access injected variables like `df`.
-            exec(code, allowed_scope, allowed_scope)
+            exec(code_obj, allowed_scope, allowed_scope)
         finally:
-            sys.stdout = old_stdout
+            _exec_stdout.reset(token)
             
         return allowed_scope
 
     def _format_column_info(self, columns: List[Dict]) -> str:
         """Format column info for prompt"""
-        info = []
-        for col in columns[:20]: # Limit to avoid token overflow
-            info.append(f"- {col['name']} ({col['dtype']}): {col['non_null_count']} non-null, {col['unique_count']} unique")
-            if 'sample_values' in col:
-                info.append(f"  Samples: {col['sample_values']}")
-        return "\n".join(info)
+        # One formatted entry per column (limit to 20 to avoid token overflow)
+        return "\n".join(
+            f"- {col['name']} ({col['dtype']}): {col['non_null_count']} non-null, {col['unique_count']} unique"
+            + (f"\n  Samples: {col['sample_values']}" if 'sample_values' in col else "")
+            for col in columns[:20]
+        )
@@ -5,14 +5,19 @@ Stage 1: Generates high-level execution plan based on problem and file list
 
 import json
 import logging
+import re
 from typing import Dict, List, Optional
 from pathlib import Path
 
 from src.bio_agents.config import Config
 from .base_analyst import BaseAnalyst
+from .data_utils import loads_json
 
 logger = logging.getLogger(__name__)
 
+# Leading ``` / ```json fence around the plan; an unterminated fence runs to the end
+_PLAN_FENCE_RE = re.compile(r'```(?:json)?(.*?)(?:```|\Z)', re.DOTALL)
+
 class AnalysisPlan:
     """Structure for Analysis Plan"""
     def __init__(self, plan_dict: Dict):
@@ -36,8 +41,7 @@ class PlannerLLM(BaseAnalyst):
         super().__init__(model=Config.MODEL_DATA_PLANNER)
         
         # Load prompts
-        prompt_content = self._read_prompt_file("planner_prompts.md")
-        self.prompts = self._split_prompts(prompt_content)
+        self.prompts = self._load_prompts("planner_prompts.md")
 
     def create_plan(
         self,
@@ -65,7 +69,7 @@ class PlannerLLM(BaseAnalyst):
         try:
             logger.info(f"[PlannerLLM]   Calling LLM...")
             llm_start = time.time()
-            response = self._call_llm(messages)
+            response = self._call_llm_cached(messages)
             llm_time = time.time() - llm_start
             logger.info(f"[PlannerLLM]   ✓ LLM responded in {llm_time:.2f}s")
             logger.info(f"[PlannerLLM]   ✓ Response length: {len(response)} chars")
@@ -125,15 +129,22 @@ class PlannerLLM(BaseAnalyst):
 
     def _parse_plan(self, response: str) -> AnalysisPlan:
         """Parse LLM JSON response"""
+        # Fast path: structured-output responses are bare JSON, no fence to strip
+        try:
+            plan_dict = loads_json(response)
+        except json.JSONDecodeError:
+            plan_dict = None
+        if isinstance(plan_dict, dict):
+            return AnalysisPlan(plan_dict)
+
         try:
             # Clean response (handle markdown code blocks)
             cleaned = response.strip()
-            if cleaned.startswith("```"):
-                cleaned = cleaned.split("```")[1]
-                if cleaned.startswith("json"):
-                    cleaned = cleaned[4:]
+            fence = _PLAN_FENCE_RE.match(cleaned)
+            if fence:
+                cleaned = fence.group(1)
             
-            plan_dict = json.loads(cleaned)
+            plan_dict = loads_json(cleaned)
             return AnalysisPlan(plan_dict)
         except json.JSONDecodeError:
             logger.warning("Planner LLM response was not valid JSON, creating fallback plan")
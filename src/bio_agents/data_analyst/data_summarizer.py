@@ -3,17 +3,62 @@ Summarizer LLM Module
 Stage 3: Generates natural language summary from analysis results
 """
 
-import json
 import logging
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from pathlib import Path
 
 from src.bio_agents.config import Config
 from .base_analyst import BaseAnalyst
+from .data_utils import dumps_json
 from .data_planner import AnalysisPlan
 
 logger = logging.getLogger(__name__)
 
+# Character budget for the serialized execution results in the user prompt
+_RESULTS_MAX_CHARS = 15000
+
+
+def _truncate_for_prompt(obj: Any, budget: int) -> Tuple[Any, int]:
+    """
+    Prune obj to roughly budget characters of JSON before it is serialized
+
+    Returns (pruned, cost). cost is a lower bound on the serialized length (quotes,
+    separators and indentation are not counted), so anything dropped here would have
+    landed past the budget in the full JSON and been cut by the final slice anyway.
+    """
+    budget = max(budget, 0)
+    if isinstance(obj, str):
+        if len(obj) > budget:
+            return obj[:budget] + "...", budget
+        return obj, len(obj)
+    if isinstance(obj, dict):
+        pruned = {}
+        cost = 0
+        for i, (key, value) in enumerate(obj.items()):
+            if cost >= budget:
+                pruned["..."] = f"<truncated {len(obj) - i} keys>"
+                break
+            cost += len(str(key))
+            pruned[key], child_cost = _truncate_for_prompt(value, budget - cost)
+            cost += child_cost
+        return pruned, cost
+    if isinstance(obj, (list, tuple)):
+        pruned = []
+        cost = 0
+        for i, value in enumerate(obj):
+            if cost >= budget:
+                pruned.append(f"<truncated {len(obj) - i} items>")
+                break
+            item, child_cost = _truncate_for_prompt(value, budget - cost)
+            pruned.append(item)
+            cost += child_cost
+        return pruned, cost
+    # Numbers, booleans and None serialize to at least one character; other leaves
+    # are passed through untouched and counted as zero to keep the bound safe
+    if obj is None or isinstance(obj, (bool, int, float)):
+        return obj, 1
+    return obj, 0
+
 
 class SummarizerLLM(BaseAnalyst):
     """
@@ -26,8 +71,7 @@ class SummarizerLLM(BaseAnalyst):
         super().__init__(model=Config.MODEL_DATA_SUMMARIZER)
         
         # Load consolidated prompts
-        prompt_content = self._read_prompt_file("summarizer_prompts.md")
-        self.prompts = self._split_prompts(prompt_content)
+        self.prompts = self._load_prompts("summarizer_prompts.md")
 
     def summarize(
         self,
@@ -59,7 +103,7 @@ class SummarizerLLM(BaseAnalyst):
             logger.info(f"[SummarizerLLM]   Calling LLM (temperature=0.3)...")
             llm_start = time.time()
             # Need slightly higher creativity/fluency for summary
-            summary = self._call_llm(messages, temperature=0.3)
+            summary = self._call_llm_cached(messages, temperature=0.3)
             llm_time = time.time() - llm_start
             summary_time = time.time() - summary_start
             
@@ -91,24 +135,26 @@ class SummarizerLLM(BaseAnalyst):
             if single_sub:
                 sub_problems = [single_sub]
 
-        # Build sub_problems text
-        sub_problems_text = ""
-        if sub_problems:
-            for i, sp in enumerate(sub_problems, 1):
-                sub_problems_text += f"""
+        # Build sub_problems text (each block carries its own surrounding newlines)
+        sub_problems_text = "".join(
+            f"""
 ### Sub-problem {i}: {sp.get('title', 'N/A')}
 - **ID**: {sp.get('id', 'N/A')}
 - **Description**: {sp.get('description', 'N/A')}
 - **Suggested Approach**: {sp.get('suggested_approach', 'N/A')}
 - **Required Data**: {sp.get('DB_list', 'N/A')}
 """
+            for i, sp in enumerate(sub_problems, 1)
+        )
 
-        # Format results for prompt
-        results_str = json.dumps(results, indent=2, ensure_ascii=False)
+        # Format results for prompt; prune first so serialization cost tracks the
+        # prompt budget rather than the size of the results
+        pruned_results, _ = _truncate_for_prompt(results, _RESULTS_MAX_CHARS)
+        results_str = dumps_json(pruned_results).decode('utf-8')
 
         # Truncate if too long - increased limit for more detailed analysis
-        if len(results_str) > 15000:
-            results_str = results_str[:15000] + "\n... (truncated)"
+        if len(results_str) > _RESULTS_MAX_CHARS:
+            results_str = results_str[:_RESULTS_MAX_CHARS] + "\n... (truncated)"
 
         # Plan context if available
         plan_context = ""
@@ -7,18 +7,146 @@ Combines functionality of former FileResolver and DataLoader.
 import os
 import re
 import json
+import codecs
+import functools
+import itertools
+import bisect
 import gzip
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import mmap
+import hashlib
+import tempfile
+import threading
+import time
 import logging
 import pandas as pd
 from pathlib import Path
-from typing import List, Dict, Optional, Union, Tuple, Any
+from typing import List, Dict, Iterator, NamedTuple, Optional, Union, Tuple, Any
+
+try:
+    import orjson
+except ImportError:  # Optional accelerator; stdlib json is used when unavailable
+    orjson = None
+
+try:
+    import ijson
+except ImportError:  # Optional; lets sampled loads of top-level JSON arrays stop early
+    ijson = None
+
+try:
+    from charset_normalizer import from_bytes as detect_charset
+except ImportError:  # Optional; without it the ENCODINGS order decides
+    detect_charset = None
 
 logger = logging.getLogger(__name__)
 
+# Extensions indexed by FileResolver
+_SUPPORTED_DATA_EXTS = frozenset({
+    # 테이블 형식
+    '.csv', '.tsv', '.txt', '.tab', '.xlsx', '.xls',
+    # 구조화 데이터
+    '.json', '.parquet', '.feather', '.hdf5', '.h5',
+    # 문서 형식
+    '.md', '.markdown',
+    # 생물정보학: 시퀀싱 데이터
+    '.fastq', '.fq', '.fasta', '.fa', '.fna', '.ffn', '.faa', '.frn',
+    '.fastq.gz', '.fq.gz', '.fasta.gz', '.fa.gz',
+    # 생물정보학: 얼라인먼트
+    '.sam', '.bam', '.cram',
+    # 생물정보학: Nanopore
+    '.pod5', '.fast5', '.blow5',
+    # 생물정보학: 변이/어노테이션
+    '.vcf', '.vcf.gz', '.bcf', '.gff', '.gff3', '.gtf', '.bed', '.bedGraph', '.bigWig', '.bw',
+    # 생물정보학: 기타
+    '.maf', '.psl', '.chain', '.wig'
+})
+
+# Pipeline step directories written by main.py; they hold agent artifacts, not input data
+_EXCLUDED_PIPELINE_DIRS = frozenset({
+    '01_brain', '02_search', '03_data_analysis', '04_blue_draft',
+    '05_red_critique', '06_bluex_revision', '07_red_review', '08_answer',
+})
+
+# Keyword tokenizer for DB_list references
+_WORD_RE = re.compile(r'\w+')
+
+# Folder/reference normalization for _match_folder: "Q1 features" / "Q1_features" -> "q1.features"
+_NORMALIZE_TABLE = str.maketrans({' ': '.', '_': '.'})
+
+
+class _IndexedFile(NamedTuple):
+    """Path string and file name of an indexed file, taken straight from its DirEntry"""
+    path: str
+    name: str
+
+
+# Memoized: the same filenames recur across index rebuilds (one FileResolver per
+# agent and per problem directory) and across DataLoader calls
+@functools.lru_cache(maxsize=4096)
+def _effective_ext(filename: str) -> str:
+    """
+    Lowercased extension of a bare filename, keeping one inner suffix for ``.gz``
+
+    String-only equivalent of ``_get_effective_ext`` (no Path/suffixes objects),
+    used on the hot path of the index build: "a.fastq.gz" -> ".fastq.gz",
+    "a.CSV" -> ".csv", ".hidden" -> "".
+    """
+    stem, _, ext = filename.rpartition('.')
+    if not stem or not ext:
+        return ''
+    ext = '.' + ext.lower()
+    if ext == '.gz':
+        inner_stem, _, inner = stem.rpartition('.')
+        if inner_stem.lstrip('.'):
+            return '.' + inner.lower() + ext
+    return ext
+
+
+def load_json_file(file_path: Union[str, Path]) -> Any:
+    """Parse a JSON file, using orjson (straight from bytes) when available"""
+    if orjson is not None:
+        raw = Path(file_path).read_bytes()
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            # orjson is strict (no BOM, NaN, ...); let the stdlib parser decide
+            return json.loads(raw.decode('utf-8-sig'))
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def loads_json(data: Union[str, bytes]) -> Any:
+    """Parse a JSON document, using orjson when available (stdlib for what orjson rejects)"""
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # orjson is strict (no NaN/Infinity, ...); let the stdlib parser decide
+            pass
+    return json.loads(data)
+
+
+def dumps_json(obj: Any) -> bytes:
+    """Serialize obj to indented UTF-8 JSON bytes, using orjson when available"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(
+                obj,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+            )
+        except TypeError:
+            # Types orjson cannot handle fall through to the stdlib encoder
+            pass
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+
 
 class FileResolver:
     """Resolves DB_list references to actual file paths"""
 
+    # Question prefixes a reference may omit (lowercased; e.g. "source.csv" -> "Q1.source.csv")
+    _EXACT_MATCH_PREFIXES = ('q1.', 'q2.', 'q3.', 'q4.', 'q5.')
+
     def __init__(self, data_dir: Union[str, Path]):
         """
         Initialize FileResolver
@@ -32,42 +160,102 @@ class FileResolver:
             # but raising error is safer if config is expected to be correct
             logger.warning(f"Data directory does not exist: {data_dir}")
 
-        # Build file index for fast lookup
-        self._file_index = self._build_file_index()
+        # File index for fast lookup, built on first use (see _index)
+        self._file_index: Optional[Dict[str, Any]] = None
+        self._index_lock = threading.Lock()
+        # Single-reference results for the current index (ref -> matches);
+        # upstream calls repeat the same DB_list entries across sub-problems
+        self._resolve_cache: Dict[str, List[Dict[str, str]]] = {}
     
+    @property
+    def _index(self) -> Dict[str, Any]:
+        """The file index, scanning data_dir the first time it is needed"""
+        if self._file_index is None:
+            with self._index_lock:
+                if self._file_index is None:
+                    self._file_index = self._build_file_index()
+        return self._file_index
+
     @staticmethod
     def _get_effective_ext(p: Path) -> str:
-        # e.g., ["sample", ".fastq", ".gz"] -> ".fastq.gz"
-        if len(p.suffixes) >= 2 and p.suffixes[-1].lower() == ".gz":
-            return (p.suffixes[-2] + p.suffixes[-1]).lower()
-        return p.suffix.lower()
+        # e.g., "sample.fastq.gz" -> ".fastq.gz"
+        return _effective_ext(p.name)
+
+    @staticmethod
+    def _scan_dir(dir_path: str) -> Tuple[List[os.DirEntry], List[Tuple[str, str]]]:
+        """
+        List one directory: (non-directory entries, [(path, name) of subdirectories to enter])
+
+        Entry types come from the cached readdir d_type. Pipeline artifact folders and
+        directory symlinks are not entered; an unreadable directory lists as empty.
+        """
+        files = []
+        subdirs = []
+        try:
+            it = os.scandir(dir_path)
+        except OSError:
+            return files, subdirs
+        with it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    if entry.name not in _EXCLUDED_PIPELINE_DIRS and not entry.is_symlink():
+                        subdirs.append((entry.path, entry.name))
+                else:
+                    files.append(entry)
+        return files, subdirs
+
+    @classmethod
+    def _iter_files(cls, top: str, top_name: str) -> Iterator[Tuple[str, os.DirEntry]]:
+        """
+        Lazily walk a directory tree, yielding (folder_name, entry) for each non-directory
+
+        Pre-order over os.scandir, in the same order as os.walk(topdown=True), so callers
+        can filter by name before paying for a Path or stat call.
+        """
+        stack = [(top, top_name)]
+        while stack:
+            dir_path, folder_name = stack.pop()
+            files, subdirs = cls._scan_dir(dir_path)
+            for entry in files:
+                yield folder_name, entry
+            stack.extend(reversed(subdirs))
+
+    @classmethod
+    def _walk_files(cls, top: str, top_name: str) -> Iterator[Tuple[str, os.DirEntry]]:
+        """
+        _iter_files with each top-level subtree walked on its own thread
+
+        scandir releases the GIL during its syscalls, so subtrees (problem_1/, problem_2/,
+        ...) are listed concurrently. Results are chained in subdirectory order, so the
+        sequence is the same as _iter_files.
+        """
+        files, subdirs = cls._scan_dir(top)
+        top_files = ((top_name, entry) for entry in files)
+        if len(subdirs) <= 1:
+            return itertools.chain(top_files, *(cls._iter_files(*subdir) for subdir in subdirs))
+
+        max_workers = min(32, (os.cpu_count() or 1) * 4, len(subdirs))
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="FileIndex") as pool:
+            subtrees = list(pool.map(lambda subdir: list(cls._iter_files(*subdir)), subdirs))
+        return itertools.chain(top_files, *subtrees)
 
     def _build_file_index(self) -> Dict[str, Any]:
         """Build index of all data files for fast lookup"""
         index = {
-            'by_name': {},      # filename -> [paths]
-            'by_folder': {},    # folder_name -> [paths]
-            'by_pattern': []    # all files for pattern matching
-        }
-
-        supported_extensions = {
-            # 테이블 형식
-            '.csv', '.tsv', '.txt', '.tab', '.xlsx', '.xls',
-            # 구조화 데이터
-            '.json', '.parquet', '.feather', '.hdf5', '.h5',
-            # 문서 형식
-            '.md', '.markdown',
-            # 생물정보학: 시퀀싱 데이터
-            '.fastq', '.fq', '.fasta', '.fa', '.fna', '.ffn', '.faa', '.frn',
-            '.fastq.gz', '.fq.gz', '.fasta.gz', '.fa.gz',
-            # 생물정보학: 얼라인먼트
-            '.sam', '.bam', '.cram',
-            # 생물정보학: Nanopore
-            '.pod5', '.fast5', '.blow5',
-            # 생물정보학: 변이/어노테이션
-            '.vcf', '.vcf.gz', '.bcf', '.gff', '.gff3', '.gtf', '.bed', '.bedGraph', '.bigWig', '.bw',
-            # 생물정보학: 기타
-            '.maf', '.psl', '.chain', '.wig'
+            'by_name': {},      # filename -> [_IndexedFile]
+            'by_prefixed_name': {},  # filename without its Q1.-Q5. prefix -> [_IndexedFile]
+            'by_folder': {},    # folder_name -> [_IndexedFile]
+            'by_folder_lower': {},       # folder_name -> lowercased folder_name
+            'by_folder_normalized': {},  # folder_name -> lowercased, ' '/'_' mapped to '.'
+            'by_pattern': [],   # all files (_IndexedFile) for pattern matching
+            'by_token': {},     # lowercased path word -> {position in by_pattern}
+            'token_text': '',   # by_token words joined by NUL, for C-level substring search
+            'token_starts': [], # offset of each word in token_text (by_token order)
+            'token_postings': []  # by_token values, aligned with token_starts
         }
 
         if not self.data_dir.exists():
@@ -75,36 +263,56 @@ class FileResolver:
             return index
 
         logger.info(f"[FileResolver._build_file_index] Building file index from: {self.data_dir}")
+        build_start = time.time()
         indexed_count = 0
         skipped_count = 0
         
-        for root, dirs, files in os.walk(self.data_dir):
-            root_path = Path(root)
-            folder_name = root_path.name
-
-            for filename in files:
-                file_path = root_path / filename
-                ext = FileResolver._get_effective_ext(file_path)
-
-                if ext in supported_extensions:
-                    # Index by filename
-                    name_lower = filename.lower()
-                    if name_lower not in index['by_name']:
-                        index['by_name'][name_lower] = []
-                    index['by_name'][name_lower].append(file_path)
-
-                    # Index by folder
-                    if folder_name not in index['by_folder']:
-                        index['by_folder'][folder_name] = []
-                    index['by_folder'][folder_name].append(file_path)
-
-                    # Add to pattern list
-                    index['by_pattern'].append(file_path)
-                    indexed_count += 1
-                else:
-                    skipped_count += 1
-
-        logger.info(f"[FileResolver._build_file_index] ✓ Index built: {indexed_count} files indexed, {skipped_count} skipped")
+        # Match str(Path(...)): Path('.') / name renders as 'name', scandir('.') as './name'
+        prefix_len = len(os.curdir + os.sep) if str(self.data_dir) == os.curdir else 0
+
+        by_name = defaultdict(list)
+        by_folder = defaultdict(list)
+        by_pattern = index['by_pattern']
+        by_token = defaultdict(set)
+
+        for folder_name, entry in self._walk_files(str(self.data_dir), self.data_dir.name):
+            filename = entry.name
+            if _effective_ext(filename) not in _SUPPORTED_DATA_EXTS:
+                skipped_count += 1
+                continue
+            # DirEntry already holds the path and name strings; no Path needed
+            file_path = _IndexedFile(entry.path[prefix_len:], filename)
+            by_name[filename.lower()].append(file_path)
+            by_folder[folder_name].append(file_path)
+            for token in _WORD_RE.findall(file_path.path.lower()):
+                by_token[token].add(len(by_pattern))
+            by_pattern.append(file_path)
+            indexed_count += 1
+
+        # Plain dicts again so lookups on the finished index never insert empty lists
+        index['by_name'] = dict(by_name)
+        # Aliases for _match_exact, filled in prefix order so hits keep the Q1 .. Q5 ordering
+        by_prefixed_name = defaultdict(list)
+        for prefix in self._EXACT_MATCH_PREFIXES:
+            for name_lower, paths in index['by_name'].items():
+                if name_lower.startswith(prefix):
+                    by_prefixed_name[name_lower[len(prefix):]].extend(paths)
+        index['by_prefixed_name'] = dict(by_prefixed_name)
+        index['by_folder'] = dict(by_folder)
+        index['by_folder_lower'] = {name: name.lower() for name in by_folder}
+        index['by_folder_normalized'] = {
+            name: lower.translate(_NORMALIZE_TABLE) for name, lower in index['by_folder_lower'].items()
+        }
+        index['by_token'] = dict(by_token)
+        # Words never contain NUL, so a keyword hit in the packed text lies inside one word
+        index['token_text'] = '\0'.join(index['by_token'])
+        index['token_postings'] = list(index['by_token'].values())
+        index['token_starts'] = list(itertools.accumulate(
+            (len(token) + 1 for token in index['by_token']), initial=0
+        ))[:-1]
+
+        logger.info(f"[FileResolver._build_file_index] ✓ Index built in {time.time() - build_start:.2f}s: "
+                    f"{indexed_count} files indexed, {skipped_count} skipped")
         logger.info(f"[FileResolver._build_file_index]   Unique filenames: {len(index['by_name'])}")
         logger.info(f"[FileResolver._build_file_index]   Folders: {len(index['by_folder'])}")
         return index
@@ -123,7 +331,7 @@ class FileResolver:
         """
         logger.info(f"[FileResolver] Resolving DB_list: '{db_list}'")
         logger.info(f"[FileResolver]   Data directory: {self.data_dir}")
-        logger.info(f"[FileResolver]   Indexed files: {len(self._file_index['by_pattern'])}")
+        logger.info(f"[FileResolver]   Indexed files: {len(self._index['by_pattern'])}")
         
         if not db_list or not db_list.strip():
             logger.warning(f"[FileResolver]   ⚠ Empty DB_list provided")
@@ -142,7 +350,7 @@ class FileResolver:
 
             logger.info(f"[FileResolver]   [{ref_idx}/{len(references)}] Resolving: '{ref}'")
             # Try different resolution strategies
-            resolved = self._resolve_single(ref)
+            resolved = self._resolve_single_cached(ref)
             logger.info(f"[FileResolver]     → Found {len(resolved)} matches")
             for match_idx, match in enumerate(resolved, 1):
                 logger.info(f"[FileResolver]       [{match_idx}] {match['name']} ({match.get('match_type', 'unknown')})")
@@ -163,6 +371,16 @@ class FileResolver:
         logger.info(f"[FileResolver] ✓ Resolved '{db_list}' to {len(unique_results)} unique files")
         return unique_results
 
+    def _resolve_single_cached(self, ref: str) -> List[Dict[str, str]]:
+        """Memoized _resolve_single; returns fresh dicts so callers may mutate them"""
+        resolved = self._resolve_cache.get(ref)
+        if resolved is None:
+            resolved = self._resolve_single(ref)
+            self._resolve_cache[ref] = resolved
+        else:
+            logger.debug(f"[FileResolver._resolve_single] Cache hit: '{ref}'")
+        return [dict(match) for match in resolved]
+
     def _resolve_single(self, ref: str) -> List[Dict[str, str]]:
         """Resolve a single reference string"""
         logger.debug(f"[FileResolver._resolve_single] Attempting to resolve: '{ref}'")
@@ -196,7 +414,7 @@ class FileResolver:
         logger.debug(f"[FileResolver._resolve_single]     ⊘ No pattern match")
 
         logger.warning(f"[FileResolver._resolve_single]   ✗ Could not resolve reference: '{ref}'")
-        logger.warning(f"[FileResolver._resolve_single]     Available files in index: {len(self._file_index['by_pattern'])}")
+        logger.warning(f"[FileResolver._resolve_single]     Available files in index: {len(self._index['by_pattern'])}")
         return results
 
     def _match_exact(self, ref: str) -> List[Dict[str, str]]:
@@ -205,25 +423,22 @@ class FileResolver:
         results = []
 
         # Direct lookup
-        if ref_lower in self._file_index['by_name']:
-            for path in self._file_index['by_name'][ref_lower]:
+        if ref_lower in self._index['by_name']:
+            for path in self._index['by_name'][ref_lower]:
                 results.append({
-                    'path': str(path),
+                    'path': path.path,
                     'name': path.name,
                     'match_type': 'exact'
                 })
 
-        # Try with common prefixes (Q1., Q5., etc.)
+        # Try with common prefixes (Q1., Q5., etc.), pre-stripped at index time
         if not results:
-            for prefix in ['Q1.', 'Q2.', 'Q3.', 'Q4.', 'Q5.']:
-                prefixed = f"{prefix}{ref}".lower()
-                if prefixed in self._file_index['by_name']:
-                    for path in self._file_index['by_name'][prefixed]:
-                        results.append({
-                            'path': str(path),
-                            'name': path.name,
-                            'match_type': 'exact_prefixed'
-                        })
+            for path in self._index['by_prefixed_name'].get(ref_lower, ()):
+                results.append({
+                    'path': path.path,
+                    'name': path.name,
+                    'match_type': 'exact_prefixed'
+                })
 
         return results
 
@@ -232,21 +447,22 @@ class FileResolver:
         results = []
 
         # Extract keywords from reference
-        ref_keywords = re.findall(r'\w+', ref.lower())
+        ref_keywords = _WORD_RE.findall(ref.lower())
 
         if not ref_keywords:
             return []
 
         # Strategy 1: Keyword-based partial matching
         # e.g., "exhaustion_signature" matches "Q5.exhaustion_signature"
-        for folder_name, paths in self._file_index['by_folder'].items():
-            folder_lower = folder_name.lower()
+        folder_lowers = self._index['by_folder_lower']
+        for folder_name, paths in self._index['by_folder'].items():
+            folder_lower = folder_lowers[folder_name]
 
             # Check if all keywords are present in folder name
             if all(kw in folder_lower for kw in ref_keywords):
                 for path in paths:
                     results.append({
-                        'path': str(path),
+                        'path': path.path,
                         'name': path.name,
                         'match_type': 'folder_keyword'
                     })
@@ -256,16 +472,17 @@ class FileResolver:
                     return results
 
         # Strategy 2: Normalized matching (fallback)
-        ref_normalized = ref.lower().replace(' ', '.').replace('_', '.')
+        ref_normalized = ref.lower().translate(_NORMALIZE_TABLE)
 
-        for folder_name, paths in self._file_index['by_folder'].items():
-            folder_normalized = folder_name.lower().replace(' ', '.').replace('_', '.')
+        folder_normalizeds = self._index['by_folder_normalized']
+        for folder_name, paths in self._index['by_folder'].items():
+            folder_normalized = folder_normalizeds[folder_name]
 
             # Check if folder matches
             if ref_normalized in folder_normalized or folder_normalized in ref_normalized:
                 for path in paths:
                     results.append({
-                        'path': str(path),
+                        'path': path.path,
                         'name': path.name,
                         'match_type': 'folder_normalized'
                     })
@@ -277,26 +494,51 @@ class FileResolver:
         results = []
 
         # Extract keywords from reference
-        keywords = re.findall(r'\w+', ref.lower())
+        keywords = _WORD_RE.findall(ref.lower())
         if not keywords:
             return []
 
-        for path in self._file_index['by_pattern']:
-            path_str = str(path).lower()
-
-            # Check if all keywords are in the path
-            if all(kw in path_str for kw in keywords):
-                results.append({
-                    'path': str(path),
-                    'name': path.name,
-                    'match_type': 'pattern'
-                })
+        # A keyword (word characters only) is a substring of a path exactly when it is
+        # a substring of one of the path's words, so each keyword's candidates are the
+        # union of postings of the words containing it. Those words are found with
+        # str.find over the packed vocabulary, jumping to the next word after each hit.
+        index = self._index
+        token_postings = index['token_postings']
+        token_text = index['token_text']
+        token_starts = index['token_starts']
+        postings = []
+        for kw in set(keywords):
+            matched = set()
+            pos = token_text.find(kw)
+            while pos != -1:
+                word = bisect.bisect_right(token_starts, pos) - 1
+                matched |= token_postings[word]
+                if word + 1 == len(token_starts):
+                    break
+                pos = token_text.find(kw, token_starts[word + 1])
+            if not matched:
+                return []
+            postings.append(matched)
+
+        postings.sort(key=len)
+        candidates = postings[0].intersection(*postings[1:])
+
+        by_pattern = index['by_pattern']
+        for pos in sorted(candidates):
+            path = by_pattern[pos]
+            results.append({
+                'path': path.path,
+                'name': path.name,
+                'match_type': 'pattern'
+            })
 
         return results
     
     def refresh_index(self) -> None:
         """Refresh the file index (call after adding new files)"""
-        self._file_index = self._build_file_index()
+        with self._index_lock:
+            self._file_index = self._build_file_index()
+        self._resolve_cache = {}
 
 
 class DataLoader:
@@ -336,12 +578,16 @@ class DataLoader:
     # Encodings to try in order
     ENCODINGS = ['utf-8-sig', 'utf-8', 'latin1', 'cp949', 'euc-kr']
 
+    # Bytes read to guess a text file's encoding
+    ENCODING_SNIFF_BYTES = 64 * 1024
+
+    # Read size for newline counting; bytes.count scans each block in C (memchr)
+    LINE_COUNT_CHUNK_SIZE = 16 * 1024 * 1024
+
     @staticmethod
     def _get_effective_ext(p: Path) -> str:
         """Get effective file extension, handling .gz compression"""
-        if len(p.suffixes) >= 2 and p.suffixes[-1].lower() == ".gz":
-            return (p.suffixes[-2] + p.suffixes[-1]).lower()
-        return p.suffix.lower()
+        return _effective_ext(p.name)
 
     def __init__(self, max_sample_rows: int = 1000):
         """
@@ -351,6 +597,10 @@ class DataLoader:
             max_sample_rows: Maximum rows to load for sampling
         """
         self.max_sample_rows = max_sample_rows
+        # path -> encoding that decoded it; files are re-read across stages and retries
+        self._encoding_cache: Dict[str, str] = {}
+        # (path, size, mtime_ns) -> total rows; skips re-counting unchanged files
+        self._rowcount_cache: Dict[Tuple[str, int, int], int] = {}
 
     def load_file(
         self,
@@ -379,8 +629,9 @@ class DataLoader:
 
         logger.info(f"Loading file: {file_path} (format: {format_type})")
 
-        # Get file size
-        file_size = file_path.stat().st_size
+        # Get file size (the stat also keys the row-count cache)
+        stat_result = os.stat(file_path)
+        file_size = stat_result.st_size
 
         # Determine rows to load
         if n_rows is None and sample:
@@ -415,7 +666,7 @@ class DataLoader:
                 raise ValueError(f"Unknown format type: {format_type}")
 
             # Count total rows (efficiently)
-            total_rows = self._count_total_rows(file_path, format_type)
+            total_rows = self._count_total_rows(file_path, format_type, stat_result)
 
             metadata = {
                 'file_path': str(file_path),
@@ -437,16 +688,58 @@ class DataLoader:
             logger.error(f"Error loading file {file_path}: {type(e).__name__}: {str(e)}")
             raise
 
-    def _load_csv(self, file_path: Path, n_rows: Optional[int]) -> Tuple[pd.DataFrame, str]:
-        """Load CSV file with encoding detection"""
-        for encoding in self.ENCODINGS:
+    def _sniff_encoding(self, file_path: Path) -> str:
+        """
+        Guess a file's text encoding from its first ENCODING_SNIFF_BYTES
+
+        BOMs first, then the first of ENCODINGS that decodes the sample; when the sample
+        is not UTF-8 and charset_normalizer is installed, its best guess is preferred
+        over latin1 (which decodes anything). Results are cached per path.
+        """
+        key = str(file_path)
+        encoding = self._encoding_cache.get(key)
+        if encoding is not None:
+            return encoding
+
+        with open(file_path, 'rb') as f:
+            raw = f.read(self.ENCODING_SNIFF_BYTES)
+
+        if raw.startswith(codecs.BOM_UTF8):
+            encoding = 'utf-8-sig'
+        elif raw.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+            encoding = 'utf-16'
+        else:
+            for candidate in self.ENCODINGS:
+                try:
+                    # Incremental so a multi-byte character cut at the sample end is not an error
+                    codecs.getincrementaldecoder(candidate)().decode(raw, final=False)
+                except UnicodeDecodeError:
+                    continue
+                encoding = candidate
+                break
+            if encoding not in ('utf-8-sig', 'utf-8') and detect_charset is not None:
+                best = detect_charset(raw).best()
+                if best is not None:
+                    encoding = best.encoding
+
+        encoding = encoding or self.ENCODINGS[0]
+        self._encoding_cache[key] = encoding
+        return encoding
+
+    def _read_delimited(self, file_path: Path, n_rows: Optional[int], sep: str) -> Tuple[pd.DataFrame, str]:
+        """Read a delimited file with the sniffed encoding, retrying the others on decode errors"""
+        sniffed = self._sniff_encoding(file_path)
+        for encoding in [sniffed] + [e for e in self.ENCODINGS if e != sniffed]:
             try:
                 df = pd.read_csv(
                     file_path,
+                    sep=sep,
                     encoding=encoding,
                     nrows=n_rows,
                     low_memory=False
                 )
+                if encoding != sniffed:
+                    self._encoding_cache[str(file_path)] = encoding
                 return df, encoding
             except UnicodeDecodeError:
                 continue
@@ -458,26 +751,13 @@ class DataLoader:
 
         raise ValueError(f"Could not decode {file_path} with supported encodings")
 
+    def _load_csv(self, file_path: Path, n_rows: Optional[int]) -> Tuple[pd.DataFrame, str]:
+        """Load CSV file with encoding detection"""
+        return self._read_delimited(file_path, n_rows, ',')
+
     def _load_tsv(self, file_path: Path, n_rows: Optional[int]) -> Tuple[pd.DataFrame, str]:
         """Load TSV file with encoding detection"""
-        for encoding in self.ENCODINGS:
-            try:
-                df = pd.read_csv(
-                    file_path,
-                    sep='\t',
-                    encoding=encoding,
-                    nrows=n_rows,
-                    low_memory=False
-                )
-                return df, encoding
-            except UnicodeDecodeError:
-                continue
-            except Exception as e:
-                if 'codec' in str(e).lower():
-                    continue
-                raise
-
-        raise ValueError(f"Could not decode {file_path} with supported encodings")
+        return self._read_delimited(file_path, n_rows, '\t')
 
     def _load_text(self, file_path: Path, n_rows: Optional[int]) -> Tuple[pd.DataFrame, str]:
         """Load text file - try TSV first, then CSV"""
@@ -497,11 +777,7 @@ class DataLoader:
         for encoding in self.ENCODINGS:
             try:
                 with open(file_path, 'r', encoding=encoding) as f:
-                    lines = []
-                    for i, line in enumerate(f):
-                        if n_rows and i >= n_rows:
-                            break
-                        lines.append(line.strip())
+                    lines = [line.strip() for line in itertools.islice(f, n_rows or None)]
                 df = pd.DataFrame({'content': lines})
                 return df, encoding
             except UnicodeDecodeError:
@@ -515,34 +791,68 @@ class DataLoader:
         return df
 
     def _load_json(self, file_path: Path, n_rows: Optional[int]) -> pd.DataFrame:
-        """Load JSON file"""
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        """Load JSON file (records beyond n_rows are never turned into rows)"""
+        if n_rows and ijson is not None:
+            array_start = self._json_array_start(file_path)
+            if array_start is not None:
+                # Parse only the leading n_rows array items instead of the whole document
+                with open(file_path, 'rb') as f:
+                    f.seek(array_start)
+                    records = list(itertools.islice(ijson.items(f, 'item', use_float=True), n_rows))
+                return pd.DataFrame(records)
+
+        data = load_json_file(file_path)
 
         # Handle different JSON structures
         if isinstance(data, list):
-            df = pd.DataFrame(data)
+            df = pd.DataFrame(data[:n_rows] if n_rows else data)
         elif isinstance(data, dict):
             # Try to find the data array
             if any(isinstance(v, list) for v in data.values()):
                 for key, value in data.items():
                     if isinstance(value, list) and len(value) > 0:
-                        df = pd.DataFrame(value)
+                        df = pd.DataFrame(value[:n_rows] if n_rows else value)
                         break
             else:
                 df = pd.DataFrame([data])
         else:
             df = pd.DataFrame({'value': [data]})
 
-        if n_rows:
-            df = df.head(n_rows)
-
         return df
 
+    @staticmethod
+    def _json_array_start(file_path: Path) -> Optional[int]:
+        """Byte offset of the top-level '[' (past any BOM/whitespace), or None for other documents"""
+        with open(file_path, 'rb') as f:
+            head = f.read(4096)
+        body = head.removeprefix(codecs.BOM_UTF8).lstrip()
+        if body[:1] != b'[':
+            return None
+        return len(head) - len(body)
+
     def _load_parquet(self, file_path: Path, n_rows: Optional[int]) -> pd.DataFrame:
-        """Load Parquet file"""
+        """Load Parquet file (for a sample, only the leading batches are decoded)"""
         if n_rows:
-            df = pd.read_parquet(file_path).head(n_rows)
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError:
+                return pd.read_parquet(file_path).head(n_rows)
+
+            # Stream record batches instead of materializing the whole file;
+            # batches stop at row-group boundaries, so gather until n_rows is reached.
+            # Closed on exit: the loader may sample many files in one session
+            with pq.ParquetFile(file_path) as pf:
+                batches = []
+                loaded = 0
+                for batch in pf.iter_batches(batch_size=n_rows):
+                    batches.append(batch)
+                    loaded += batch.num_rows
+                    if loaded >= n_rows:
+                        break
+                # The file schema carries the pandas metadata (index, dtypes) for to_pandas
+                table = pa.Table.from_batches(batches, schema=pf.schema_arrow)
+            df = table.slice(0, n_rows).to_pandas()
         else:
             df = pd.read_parquet(file_path)
         return df
@@ -710,15 +1020,42 @@ class DataLoader:
         
         return pd.DataFrame(records)
 
-    def _count_total_rows(self, file_path: Path, format_type: str) -> int:
+    @classmethod
+    def _count_lines(cls, file_path: Path) -> int:
+        """Count lines like iterating the file would, including an unterminated last line"""
+        lines = 0
+        last = b'\n'
+        with open(file_path, 'rb', buffering=0) as f:
+            for chunk in iter(lambda: f.read(cls.LINE_COUNT_CHUNK_SIZE), b''):
+                lines += chunk.count(b'\n')
+                last = chunk[-1:]
+        return lines if last == b'\n' else lines + 1
+
+    def _count_total_rows(
+        self,
+        file_path: Path,
+        format_type: str,
+        stat_result: Optional[os.stat_result] = None
+    ) -> int:
+        """Count total rows, reusing the count while the file's size and mtime are unchanged"""
+        if stat_result is None:
+            stat_result = os.stat(file_path)
+        key = (str(file_path), stat_result.st_size, stat_result.st_mtime_ns)
+        total_rows = self._rowcount_cache.get(key)
+        if total_rows is None:
+            total_rows = self._scan_total_rows(file_path, format_type)
+            if total_rows >= 0:
+                self._rowcount_cache[key] = total_rows
+        return total_rows
+
+    def _scan_total_rows(self, file_path: Path, format_type: str) -> int:
         """Efficiently count total rows in file"""
         try:
             if format_type in ['csv', 'tsv', 'text']:
                 if os.path.exists(file_path):
                      # Count lines efficiently
                     try:
-                        with open(file_path, 'rb') as f:
-                            return sum(1 for _ in f) - 1  # Subtract header
+                        return self._count_lines(file_path) - 1  # Subtract header
                     except Exception:
                          return -1 # Fallback
             elif format_type == 'excel':
@@ -775,19 +1112,27 @@ class DataLoader:
         """
         Generate detailed column information matching DataExecutor expectations
         """
+        # Whole-frame reductions: one call each instead of one scan per column
+        try:
+            non_null_counts = df.count().tolist()
+            unique_counts = df.nunique().tolist()
+        except Exception:
+            # e.g. unhashable cells; fall back to per-column counts so only that column degrades
+            non_null_counts = unique_counts = None
+
         info = []
-        for col in df.columns:
+        for i, col in enumerate(df.columns):
             try:
-                series = df[col]
+                series = df.iloc[:, i]
                 # specific handling for numpy types to ensure json serializability if needed later
                 dtype = str(series.dtype)
                 
                 col_info = {
                     'name': str(col),
                     'dtype': dtype,
-                    'non_null_count': int(series.count()),
-                    'unique_count': int(series.nunique()),
-                    'sample_values': series.dropna().unique()[:5].tolist()
+                    'non_null_count': int(non_null_counts[i] if non_null_counts is not None else series.count()),
+                    'unique_count': int(unique_counts[i] if unique_counts is not None else series.nunique()),
+                    'sample_values': self._sample_values(series)
                 }
                 info.append(col_info)
             except Exception as e:
@@ -800,3 +1145,96 @@ class DataLoader:
                     'sample_values': []
                 })
         return info
+
+    @staticmethod
+    def _sample_values(series: pd.Series, k: int = 5, window: int = 64) -> List[Any]:
+        """First k distinct non-null values, in order of appearance"""
+        values = series.dropna()
+        # The first k distinct values of a prefix are the first k of the whole column,
+        # so only hash the full column when the prefix holds fewer than k
+        head = values.iloc[:window].unique()
+        if len(head) >= k or len(values) <= window:
+            return head[:k].tolist()
+        return values.unique()[:k].tolist()
+
+
+class AnalysisCache:
+    """Disk cache for per-file analysis results, keyed by file content and analysis context"""
+
+    # Files larger than this are hashed through mmap instead of chunked reads
+    MMAP_THRESHOLD = 16 * 1024 * 1024
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, cache_dir: Union[str, Path, None]):
+        """
+        Initialize AnalysisCache
+
+        Args:
+            cache_dir: Directory for cached results (falsy value disables the cache)
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+
+    @property
+    def enabled(self) -> bool:
+        return self.cache_dir is not None
+
+    @classmethod
+    def file_digest(cls, file_path: Union[str, Path]) -> str:
+        """SHA-256 of a file's bytes, streamed so large files are never fully read into memory"""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size > cls.MMAP_THRESHOLD:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    digest.update(mm)
+            else:
+                for chunk in iter(lambda: f.read(cls.CHUNK_SIZE), b''):
+                    digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def context_digest(*parts: Any) -> str:
+        """Stable SHA-256 of JSON-serializable context (plan, problem, model, ...)"""
+        payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def key_for(self, file_path: Union[str, Path], context_digest: str) -> str:
+        """Build the cache key for a file analyzed under the given context"""
+        return hashlib.sha256(
+            f"{self.file_digest(file_path)}:{context_digest}".encode('utf-8')
+        ).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return the cached result for key, or None on miss/unreadable entry"""
+        if not self.enabled:
+            return None
+        path = self.cache_dir / f"{key}.json"
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"[AnalysisCache] Ignoring unreadable cache entry {path}: {e}")
+            return None
+
+    def put(self, key: str, value: Dict) -> None:
+        """Store value atomically (write to a temp file, then os.replace)"""
+        if not self.enabled:
+            return
+        try:
+            payload = json.dumps(value, ensure_ascii=False)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"[AnalysisCache] Result not JSON-serializable, not caching: {e}")
+            return
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(payload)
+            os.replace(tmp_path, self.cache_dir / f"{key}.json")
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
@@ -4,6 +4,7 @@ LLM-based DB List Extractor
 This module uses an LLM to extract data references from problem text.
 """
 
+import hashlib
 import json
 import logging
 import os
@@ -30,6 +31,9 @@ class DBListExtractor:
             base_url=self.base_url
         )
 
+        # Extraction results keyed by a hash of model + inputs; reruns skip the LLM call
+        self._cache: Dict[str, List[str]] = {}
+
     def extract_db_list(self, brain_output: Dict) -> List[str]:
         """
         Extract database/file references from brain module output using LLM.
@@ -49,6 +53,12 @@ class DBListExtractor:
                 logger.warning("No original_problem_text found in brain_output")
                 return []
 
+            cache_key = self._cache_key(problem_text, existing_db_list)
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"Using cached DB references: {cached}")
+                return list(cached)
+
             # Create prompt for LLM
             prompt = self._create_extraction_prompt(problem_text, existing_db_list)
 
@@ -78,12 +88,18 @@ class DBListExtractor:
             db_refs = self._parse_llm_response(extracted_text)
 
             logger.info(f"Extracted {len(db_refs)} data references using LLM: {db_refs}")
+            self._cache[cache_key] = list(db_refs)
             return db_refs
 
         except Exception as e:
             logger.error(f"Error during LLM-based extraction: {e}")
             return []
 
+    def _cache_key(self, problem_text: str, existing_db_list: str) -> str:
+        """Stable key for an extraction request (surrounding whitespace ignored)"""
+        payload = '\x00'.join((self.model, problem_text.strip(), str(existing_db_list).strip()))
+        return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
     def _create_extraction_prompt(self, problem_text: str, existing_db_list: str) -> str:
         """Create prompt for LLM to extract data references"""
         prompt = f"""Analyze the following research problem description and extract ALL data-related references.
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Modules import each other as ``src.bio_agents...``; make the repo root importable
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
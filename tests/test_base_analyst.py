@@ -0,0 +1,103 @@
+"""Streamed code generation: which failures retry without streaming"""
+
+import json
+
+import pytest
+import requests
+
+from src.bio_agents.config import Config
+from src.bio_agents.data_analyst.base_analyst import BaseAnalyst
+from src.bio_agents.data_analyst.data_utils import AnalysisCache
+
+
+class _Response:
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"choices": [{"message": {"content": "plain"}}]}
+
+
+class _StreamResponse(_Response):
+    def __init__(self, lines):
+        self.lines = lines
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def iter_lines(self):
+        return iter(self.lines)
+
+
+@pytest.fixture
+def analyst(monkeypatch):
+    monkeypatch.setattr(Config, "DATA_ANALYST_STREAM_CODE", True)
+    posts = []
+
+    def post(*args, **kwargs):
+        posts.append(kwargs)
+        if kwargs.get("stream"):
+            return _StreamResponse(analyst.stream_lines)
+        return _Response()
+
+    monkeypatch.setattr(requests, "post", post)
+    analyst = BaseAnalyst()
+    analyst.posts = posts
+    analyst.stream_lines = []
+    return analyst
+
+
+def _failing_stream(error):
+    def stream(messages, temperature=0.2):
+        raise error
+    return stream
+
+
+def test_http_error_is_not_retried(analyst):
+    analyst._call_llm_until_code_fence = _failing_stream(requests.exceptions.HTTPError("429 Too Many Requests"))
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        analyst._call_llm([{"role": "user", "content": "x"}], stop_at_code_fence=True)
+    assert analyst.posts == []
+
+
+@pytest.mark.parametrize("error", [
+    requests.exceptions.ChunkedEncodingError("connection broken"),
+    ValueError("Expecting value: line 1 column 1"),
+])
+def test_stream_errors_retry_without_streaming(analyst, error):
+    analyst._call_llm_until_code_fence = _failing_stream(error)
+
+    assert analyst._call_llm([{"role": "user", "content": "x"}], stop_at_code_fence=True) == "plain"
+    assert len(analyst.posts) == 1
+    assert "stream" not in analyst.posts[0]["json"]
+
+
+def test_non_sse_body_is_read_as_a_plain_completion(analyst):
+    body = json.dumps({"choices": [{"message": {"content": "```python\nresult = 1\n```"}}]}, indent=2)
+    analyst.stream_lines = body.encode().splitlines()
+
+    text = analyst._call_llm([{"role": "user", "content": "x"}], stop_at_code_fence=True)
+
+    assert text == "```python\nresult = 1\n```"
+    assert len(analyst.posts) == 1 and analyst.posts[0]["stream"] is True
+
+
+def test_empty_stream_retries_without_streaming(analyst):
+    analyst.stream_lines = [b": keep-alive", b"", b"data: [DONE]"]
+
+    assert analyst._call_llm([{"role": "user", "content": "x"}], stop_at_code_fence=True) == "plain"
+    assert len(analyst.posts) == 2
+    assert "stream" not in analyst.posts[1]["json"]
+
+
+def test_empty_response_is_not_cached(analyst, tmp_path):
+    cache_dir = tmp_path / "llm_cache"
+    analyst.llm_cache = AnalysisCache(str(cache_dir))
+    analyst._call_llm = lambda messages, temperature=0.2, stop_at_code_fence=False: ""
+
+    assert analyst._call_llm_cached([{"role": "user", "content": "x"}]) == ""
+    assert not cache_dir.exists() or not any(cache_dir.iterdir())
@@ -0,0 +1,137 @@
+"""Batched Stage 2 analysis: prompt, result validation and per-file fallback"""
+
+import pandas as pd
+import pytest
+
+from src.bio_agents.data_analyst.data_analyst import DataAnalystAgent
+from src.bio_agents.data_analyst.data_executor import CodeExecutor
+from src.bio_agents.data_analyst.data_utils import AnalysisCache
+
+
+def _entry(name):
+    return {"file": name, "data_type": "table", "columns": [], "data_summary": f"summary of {name}"}
+
+
+def _batch_code(result_expr):
+    return f"```python\nresult = {result_expr}\n```"
+
+
+@pytest.fixture
+def executor():
+    executor = CodeExecutor()
+    yield executor
+    executor.close()
+
+
+@pytest.fixture
+def file_infos():
+    return [
+        {"file_name": "a.csv", "file_path": "/data/a.csv", "total_rows": 2,
+         "columns": [{"name": "gene", "dtype": "object", "non_null_count": 2, "unique_count": 2,
+                      "sample_values": ["TP53"]}]},
+        {"file_name": "b.csv", "file_path": "/data/b.csv", "total_rows": 3,
+         "columns": [{"name": "score", "dtype": "float64", "non_null_count": 3, "unique_count": 3,
+                      "sample_values": [0.5]}]},
+    ]
+
+
+def test_batch_prompt_lists_every_file_in_order(executor, file_infos):
+    prompt = executor._create_batch_prompt(file_infos, {"sub_problem": {"title": "T"}})
+
+    assert prompt.index("### FILE 0 ###") < prompt.index("### FILE 1 ###")
+    assert "`dfs[0]`" in prompt and "`a.csv`" in prompt
+    assert "`dfs[1]`" in prompt and "`b.csv`" in prompt
+    assert "exactly 2 dictionaries" in prompt
+
+
+def test_validate_batch_result_accepts_matching_entries():
+    files = [_entry("a.csv"), _entry("b.csv")]
+    assert CodeExecutor._validate_batch_result({"files": files}, ["a.csv", "b.csv"]) == files
+
+
+@pytest.mark.parametrize("result", [
+    None,
+    {"files": "not a list"},
+    {"files": [_entry("a.csv")]},                                   # too few
+    {"files": [_entry("a.csv"), {"error": "boom", "file": "b.csv"}]},
+    {"files": [_entry("a.csv"), dict(_entry("b.csv"), columns="x")]},
+    {"files": [_entry("b.csv"), _entry("a.csv")]},                  # reordered
+    {"files": [_entry("a.csv"), _entry("c.csv")]},                  # renamed
+    {"files": [_entry("a.csv"), {"data_type": "table"}]},           # unlabelled
+])
+def test_validate_batch_result_rejects(result):
+    assert CodeExecutor._validate_batch_result(result, ["a.csv", "b.csv"]) is None
+
+
+def test_analyze_data_batch_runs_code_over_all_frames(executor, file_infos, monkeypatch):
+    code = _batch_code('{"files": [{"file": n, "data_summary": str(len(d))} for n, d in zip(file_names, dfs)]}')
+    monkeypatch.setattr(CodeExecutor, "_call_llm", lambda self, messages, *a, **kw: code)
+
+    dfs = [pd.DataFrame({"gene": ["x", "y"]}), pd.DataFrame({"score": [1.0, 2.0, 3.0]})]
+    results = executor.analyze_data_batch(dfs, file_infos, {})
+
+    assert [r["file"] for r in results] == ["a.csv", "b.csv"]
+    assert [r["data_summary"] for r in results] == ["2", "3"]
+
+
+def test_analyze_data_batch_rejects_swapped_entries(executor, file_infos, monkeypatch):
+    code = _batch_code('{"files": [{"file": n} for n in reversed(file_names)]}')
+    monkeypatch.setattr(CodeExecutor, "_call_llm", lambda self, messages, *a, **kw: code)
+
+    dfs = [pd.DataFrame({"gene": ["x"]}), pd.DataFrame({"score": [1.0]})]
+    assert executor.analyze_data_batch(dfs, file_infos, {}) is None
+
+
+def test_file_batch_falls_back_to_per_file_analysis(tmp_path, monkeypatch):
+    paths = []
+    for name, rows in (("a.csv", "gene\nTP53\nEGFR\n"), ("b.csv", "score\n1\n2\n3\n")):
+        path = tmp_path / name
+        path.write_text(rows)
+        paths.append(path)
+
+    with DataAnalystAgent() as agent:
+        monkeypatch.setattr(agent.code_executor, "analyze_data_batch", lambda **kw: None)
+        per_file_calls = []
+
+        def analyze_data(df, file_info, problem_context, analysis_plan=None):
+            per_file_calls.append(file_info["file_name"])
+            return _entry(file_info["file_name"])
+
+        monkeypatch.setattr(agent.code_executor, "analyze_data", analyze_data)
+        results = agent._analyze_file_batch(
+            [{"path": str(p), "name": p.name} for p in paths], {}
+        )
+
+    assert per_file_calls == ["a.csv", "b.csv"]
+    assert [r["file"] for r in results] == ["a.csv", "b.csv"]
+    assert [r["summary"] for r in results] == ["summary of a.csv", "summary of b.csv"]
+    assert [r["rows"] for r in results] == [2, 3]
+
+
+def test_failed_analysis_is_not_cached(tmp_path, monkeypatch):
+    path = tmp_path / "a.csv"
+    path.write_text("gene\nTP53\nEGFR\n")
+    cache_dir = tmp_path / "cache"
+
+    with DataAnalystAgent() as agent:
+        agent.analysis_cache = AnalysisCache(str(cache_dir))
+        monkeypatch.setattr(
+            agent.code_executor, "analyze_data",
+            lambda **kw: {"error": "Failed to generate code"}
+        )
+        results = agent._analyze_file_batch(
+            [{"path": str(path), "name": path.name}], {}, cache_context="ctx"
+        )
+
+    assert results[0]["file"] == "a.csv"
+    assert not cache_dir.exists() or not any(cache_dir.rglob("*.json"))
+
+
+def test_executed_code_prints_are_discarded_until_close(executor, capsys):
+    scope = executor._execute_code_safely("print('noise')\nresult = {'ok': True}", None, {})
+    sink = executor._discard_stdout
+
+    assert scope["result"] == {"ok": True}
+    assert capsys.readouterr().out == ""
+    executor.close()
+    assert sink.closed and executor._discard_stdout is None
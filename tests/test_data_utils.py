@@ -0,0 +1,129 @@
+"""data_utils: AnalysisCache entries and FileResolver pattern matching"""
+
+import json
+import re
+from pathlib import Path
+
+import pytest
+
+from src.bio_agents.data_analyst.data_utils import AnalysisCache, FileResolver
+
+PROBLEMS_DIR = Path(__file__).resolve().parent.parent / "problems"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return AnalysisCache(tmp_path / "cache")
+
+
+@pytest.fixture
+def data_file(tmp_path):
+    path = tmp_path / "genes.csv"
+    path.write_text("gene,score\nTP53,1.5\n")
+    return path
+
+
+def test_disabled_cache_never_stores(tmp_path):
+    cache = AnalysisCache("")
+    assert not cache.enabled
+    cache.put("k", {"a": 1})
+    assert cache.get("k") is None
+
+
+def test_miss_then_hit(cache):
+    assert cache.get("k") is None
+    cache.put("k", {"file": "genes.csv", "rows": 1})
+    assert cache.get("k") == {"file": "genes.csv", "rows": 1}
+    assert not list(cache.cache_dir.glob("*.tmp"))
+
+
+def test_key_follows_file_bytes_not_path(cache, data_file, tmp_path):
+    context = AnalysisCache.context_digest("model", {"plan": 1})
+    key = cache.key_for(data_file, context)
+
+    copy = tmp_path / "copy.csv"
+    copy.write_bytes(data_file.read_bytes())
+    assert cache.key_for(copy, context) == key
+
+    data_file.write_text("gene,score\nTP53,2.5\n")
+    assert cache.key_for(data_file, context) != key
+
+
+def test_key_follows_context(cache, data_file):
+    base = cache.key_for(data_file, AnalysisCache.context_digest("model", {"plan": 1}))
+    assert cache.key_for(data_file, AnalysisCache.context_digest("model", {"plan": 2})) != base
+    assert cache.key_for(data_file, AnalysisCache.context_digest("other", {"plan": 1})) != base
+
+
+def test_context_digest_ignores_dict_order():
+    assert AnalysisCache.context_digest({"a": 1, "b": 2}) == AnalysisCache.context_digest({"b": 2, "a": 1})
+
+
+def test_large_files_hash_the_same_through_mmap(data_file, monkeypatch):
+    chunked = AnalysisCache.file_digest(data_file)
+    monkeypatch.setattr(AnalysisCache, "MMAP_THRESHOLD", 0)
+    assert AnalysisCache.file_digest(data_file) == chunked
+
+
+@pytest.mark.parametrize("content", [b"", b'{"file": "genes.csv", "ro', b"\xff\xfe not json"])
+def test_corrupt_or_partial_entry_is_a_miss(cache, content):
+    cache.put("k", {"file": "genes.csv"})
+    (cache.cache_dir / "k.json").write_bytes(content)
+    assert cache.get("k") is None
+
+    # A later put repairs the entry
+    cache.put("k", {"file": "genes.csv"})
+    assert cache.get("k") == {"file": "genes.csv"}
+
+
+def test_unserializable_value_is_not_written(cache):
+    cache.put("k", {"value": object()})
+    assert cache.get("k") is None
+    assert not cache.cache_dir.exists() or not list(cache.cache_dir.iterdir())
+
+
+def test_entries_are_plain_json(cache):
+    cache.put("k", {"name": "유전자"})
+    assert json.loads((cache.cache_dir / "k.json").read_text(encoding="utf-8")) == {"name": "유전자"}
+
+
+# FileResolver fuzzy pattern matching: the inverted word index must give exactly
+# what the plain per-query scan (every keyword a substring of the path) gave
+
+def _scan_match(resolver, ref):
+    keywords = re.findall(r'\w+', ref.lower())
+    if not keywords:
+        return []
+    return [
+        path.path for path in resolver._index['by_pattern']
+        if all(kw in path.path.lower() for kw in keywords)
+    ]
+
+
+def _pattern_refs(resolver):
+    words = sorted({w for path in resolver._index['by_pattern'] for w in re.findall(r'\w+', path.path.lower())})
+    refs = ["", "nosuch", "csv nosuch", "Q1 features", "q5 deg", "source", "tsv, csv"]
+    for word in words:
+        refs += [word, word.upper(), word[1:4], word[:2] + " " + word[-2:], "csv " + word[:3]]
+    return refs
+
+
+@pytest.mark.parametrize("data_dir", sorted(
+    [PROBLEMS_DIR] + [d for d in PROBLEMS_DIR.iterdir() if d.is_dir()]
+) if PROBLEMS_DIR.is_dir() else [])
+def test_match_pattern_matches_linear_scan_on_problem_dirs(data_dir):
+    resolver = FileResolver(data_dir)
+    for ref in _pattern_refs(resolver):
+        assert [m['path'] for m in resolver._match_pattern(ref)] == _scan_match(resolver, ref), ref
+
+
+def test_match_pattern_matches_linear_scan_on_synthetic_tree(tmp_path):
+    for rel in ["Q1.features/a_b.csv", "Q1.features/ab.tsv", "x/Qa1b.csv", "x/y z/deep.parquet",
+                "data/Q5.exhaustion_signature/sig.txt", "data/skip.bin"]:
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("h\n1\n")
+
+    resolver = FileResolver(tmp_path)
+    for ref in _pattern_refs(resolver) + ["a1", "a b", "y z deep", "exhaustion sig", "bin"]:
+        assert [m['path'] for m in resolver._match_pattern(ref)] == _scan_match(resolver, ref), ref